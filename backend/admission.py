@@ -0,0 +1,129 @@
+# admission.py - Admission control for analysis requests
+# Coalesces frames per session (latest frame wins) and bounds global concurrency with per-request deadlines
+
+import threading
+import time
+from contextlib import contextmanager
+
+from session_store import LRUCache
+
+
+class RequestShed(Exception):
+    """Base class for requests dropped by admission control instead of being processed"""
+
+    reason = "shed"
+
+
+class Superseded(RequestShed):
+    """A newer frame from the same session arrived while this one was waiting"""
+
+    reason = "superseded"
+
+
+class DeadlineExceeded(RequestShed):
+    """The request's deadline passed before its result could be produced"""
+
+    reason = "deadline_exceeded"
+
+
+class Overloaded(RequestShed):
+    """Too many requests are already waiting for a processing slot"""
+
+    reason = "overloaded"
+
+
+def check_deadline(deadline):
+    """Raise DeadlineExceeded if the monotonic deadline has passed (None means no deadline)"""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded("Request deadline passed before processing finished")
+
+
+class _SessionSlot:
+    def __init__(self):
+        self.active = False
+        self.latest = 0  # Ticket of the newest frame waiting for this session
+        self.condition = threading.Condition()
+
+
+class AdmissionController:
+    """
+    Two-level admission control for frame analysis
+    - Per session, one frame is processed at a time and at most one waits behind it.
+      A newer frame supersedes the waiting one, which is shed right away
+    - Globally, at most max_concurrent frames are processed at once and at most
+      max_waiting wait for a slot. Waiting ends when the request's deadline passes
+    """
+
+    def __init__(self, max_concurrent=8, max_waiting=32, max_sessions=1000, ttl_seconds=None):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_waiting = max(0, int(max_waiting))
+        self._sessions = LRUCache(max_size=max_sessions, ttl_seconds=ttl_seconds)
+        self._tickets = 0
+        self._in_flight = 0
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+
+    @contextmanager
+    def admit(self, session_id, deadline=None):
+        """
+        Hold a processing slot for one frame of session_id
+        Raises Superseded, Overloaded or DeadlineExceeded when the frame is shed
+        """
+        slot = self._sessions.get_or_create(session_id, _SessionSlot)
+        self._enter_session(slot, deadline)
+        try:
+            self._acquire(deadline)
+            try:
+                yield
+            finally:
+                self._release()
+        finally:
+            with slot.condition:
+                slot.active = False
+                slot.condition.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': self._in_flight, 'waiting': self._waiting}
+
+    def _enter_session(self, slot, deadline):
+        with self._lock:
+            self._tickets += 1
+            ticket = self._tickets
+
+        with slot.condition:
+            slot.latest = ticket
+            slot.condition.notify_all()  # Wake the previously waiting frame so it sees it was superseded
+            while slot.active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise DeadlineExceeded("Request deadline passed while an earlier frame was processed")
+                slot.condition.wait(remaining)
+                if slot.latest != ticket:
+                    raise Superseded("A newer frame from this session replaced this one")
+            slot.active = True
+
+    def _acquire(self, deadline):
+        with self._condition:
+            if self._in_flight < self.max_concurrent:
+                self._in_flight += 1
+                return
+            if self._waiting >= self.max_waiting:
+                raise Overloaded("Too many analysis requests are waiting")
+
+            self._waiting += 1
+            try:
+                while self._in_flight >= self.max_concurrent:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise DeadlineExceeded("Request deadline passed while waiting for a processing slot")
+                    self._condition.wait(remaining)
+                self._in_flight += 1
+            finally:
+                self._waiting -= 1
+
+    def _release(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
@@ -1,46 +1,175 @@
 # app.py - Emotion Analysis System for Job Interviews
 # This Flask server analyzes emotions from face images and suggests appropriate interview questions
 
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, g, stream_with_context
 from flask_cors import CORS
+from flask_sock import Sock
+from simple_websocket import ConnectionClosed
 import os
-import cv2
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from tensorflow.keras.layers import Conv2D
 import base64
-import io
-from PIL import Image
+import json
+import threading
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 import time
-import requests
 import random
+import uuid
 from dotenv import load_dotenv
-import traceback
+import logging
+from lazy_modules import lazy_import
+from admission import AdmissionController, RequestShed, check_deadline
+from inference import CompiledPredictor, MicroBatcher, TFLitePredictor
+from model_cache import load_cached_model, save_cached_model
+from session_store import LRUCache, create_session_store
+from question_pool import QuestionPool
+from question_cache import QuestionCache, prompt_key
+from llm_client import LlamaClient
+from frame_decoder import decode_frame
+from face_tracking import FULL_REGION, FaceDetector, FaceTracker, expand_box, normalize_box, to_grayscale
+from frame_dedup import DuplicateFrameFilter, difference_hash
+from smoothing import EmotionSmoother
+from capture_policy import create_capture_policy
+from timeline import create_timeline_store, iter_csv, iter_xlsx, summarize
+from explain import GradCamExplainer
+from metrics import (
+    CAPTURE_DELAY, FRAMES, INFERENCE_BATCH_SIZE, LLAMA_ATTEMPTS, LLAMA_CIRCUIT_OPEN, LLAMA_LATENCY,
+    QUESTIONS, REQUEST_LATENCY, REQUESTS_SHED, registry, timed_stage
+)
+
+# Heavy modules are imported on first use so the server can answer health checks right away
+cv2 = lazy_import("cv2")
+tf = lazy_import("tensorflow")
 
 # Load environment variables
 load_dotenv()
 
+# Logging configuration - per-frame details are logged at DEBUG level
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+logging.basicConfig(
+    level=LOG_LEVEL,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
+sock = Sock(app)
 
 # LLaMA API Configuration
 LLAMA_API_URL = os.getenv("LLAMA_API_URL")
 LLAMA_API_KEY = os.getenv("LLAMA_API_KEY")
 LLAMA_TEMPERATURE = float(os.getenv("LLAMA_TEMPERATURE", "0.7"))
 LLAMA_MAX_TOKENS = int(os.getenv("LLAMA_MAX_TOKENS", "100"))
+LLAMA_BUDGET_SECONDS = float(os.getenv("LLAMA_BUDGET_SECONDS", "8"))  # Total time for one question, across retries and hedges
+LLAMA_CONNECT_TIMEOUT = float(os.getenv("LLAMA_CONNECT_TIMEOUT", "2"))
+LLAMA_HEDGE_AFTER_MS = float(os.getenv("LLAMA_HEDGE_AFTER_MS", "0"))  # Send a second request when the first is this slow, 0 disables
+LLAMA_BREAKER_FAILURES = int(os.getenv("LLAMA_BREAKER_FAILURES", "3"))  # Consecutive failed or slow calls that open the circuit
+LLAMA_BREAKER_SLOW_SECONDS = float(os.getenv("LLAMA_BREAKER_SLOW_SECONDS", "5"))  # Successful calls slower than this count as failures
+LLAMA_BREAKER_PROBE_SECONDS = float(os.getenv("LLAMA_BREAKER_PROBE_SECONDS", "15"))  # Probe interval while the circuit is open
+
+# Question pre-generation pool configuration
+QUESTION_POOL_STOCK_SIZE = int(os.getenv("QUESTION_POOL_STOCK_SIZE", "3"))
+QUESTION_POOL_WORKERS = int(os.getenv("QUESTION_POOL_WORKERS", "2"))
+QUESTION_POOL_PREFILL = os.getenv("QUESTION_POOL_PREFILL", "true").lower() == "true"
+QUESTION_CONFIDENCE_BUCKET = float(os.getenv("QUESTION_CONFIDENCE_BUCKET", "0.1"))
+
+# Generated-question cache configuration
+QUESTION_CACHE_ENABLED = os.getenv("QUESTION_CACHE_ENABLED", "true").lower() == "true"
+QUESTION_CACHE_PATH = os.getenv("QUESTION_CACHE_PATH", "question_cache.db")
+QUESTION_CACHE_MAX_BYTES = int(os.getenv("QUESTION_CACHE_MAX_BYTES", str(5 * 1024 * 1024)))
+QUESTION_CACHE_VARIANTS = int(os.getenv("QUESTION_CACHE_VARIANTS", "10"))
 
-# Custom layer definition
-class StandardizedConv2DWithOverride(Conv2D):
-    def __init__(self, **kwargs):
-        super(StandardizedConv2DWithOverride, self).__init__(**kwargs)
+# Custom layer definition - built on first use since it needs TensorFlow
+_custom_objects = None
 
-# Registering the custom layer
-custom_objects = {'StandardizedConv2DWithOverride': StandardizedConv2DWithOverride}
+def get_custom_objects():
+    """Custom layers needed to deserialize the h5 model"""
+    global _custom_objects
+    
+    if _custom_objects is None:
+        class StandardizedConv2DWithOverride(tf.keras.layers.Conv2D):
+            def __init__(self, **kwargs):
+                super(StandardizedConv2DWithOverride, self).__init__(**kwargs)
+        
+        # Registering the custom layer
+        _custom_objects = {'StandardizedConv2DWithOverride': StandardizedConv2DWithOverride}
+    return _custom_objects
 
 # Model configuration
-MODEL_PATH = "model_resnet50.h5"
+MODEL_PATH = os.getenv("MODEL_PATH", "model_resnet50.h5")
 model = None
+predictor = None  # Compiled, pre-warmed inference entry point
+model_input_shape = None  # Cached model.input_shape
+
+# Inference backend configuration
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "keras")  # "keras" or "tflite"
+TFLITE_MODEL_PATH = os.getenv("TFLITE_MODEL_PATH", "model_resnet50_int8.tflite")  # Produced by convert_tflite.py
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0"))  # TensorFlow/OpenCV threads per process, 0 keeps library defaults
+TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", str(INFERENCE_THREADS or 2)))
+
+# Model startup configuration
+MODEL_BACKGROUND_LOAD = os.getenv("MODEL_BACKGROUND_LOAD", "true").lower() == "true"  # Load and warm the model off the request path
+MODEL_LOAD_RETRY_SECONDS = float(os.getenv("MODEL_LOAD_RETRY_SECONDS", "30"))  # Wait before retrying a failed background load
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "model_cache")  # SavedModel cache of the h5 model, empty to disable
+
+model_status = {'state': 'not_loaded', 'error': None, 'failed_at': None, 'load_seconds': None}
+model_loader = None  # Background loading thread
+model_loader_lock = threading.Lock()
+
+# Inference batching configuration
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+
+# Admission control configuration
+ANALYZE_MAX_CONCURRENT = int(os.getenv("ANALYZE_MAX_CONCURRENT", str(INFERENCE_MAX_BATCH_SIZE * 2)))  # Frames processed at once
+ANALYZE_MAX_WAITING = int(os.getenv("ANALYZE_MAX_WAITING", "64"))  # Frames allowed to wait for a slot before shedding with 503
+ANALYZE_DEADLINE_MS = float(os.getenv("ANALYZE_DEADLINE_MS", "5000"))  # Default budget when the client sends no X-Request-Deadline-Ms
+ANALYZE_MAX_DEADLINE_MS = float(os.getenv("ANALYZE_MAX_DEADLINE_MS", "30000"))
+
+# Frame upload configuration
+RAW_IMAGE_MIMETYPES = {'image/jpeg', 'image/png', 'application/octet-stream'}
+FRAME_DECODE_MIN_SIDE = int(os.getenv("FRAME_DECODE_MIN_SIDE", "240"))  # Smallest short side kept by reduced JPEG decoding
+
+# Face localization configuration
+FACE_DETECTION_ENABLED = os.getenv("FACE_DETECTION_ENABLED", "true").lower() == "true"
+FACE_REDETECT_INTERVAL = int(os.getenv("FACE_REDETECT_INTERVAL", "10"))  # Run the full detector every N frames
+FACE_TRACK_MIN_CONFIDENCE = float(os.getenv("FACE_TRACK_MIN_CONFIDENCE", "0.6"))
+FACE_CROP_MARGIN = float(os.getenv("FACE_CROP_MARGIN", "0.15"))
+MULTI_FACE_MAX_FACES = int(os.getenv("MULTI_FACE_MAX_FACES", "8"))  # Faces analyzed per frame in multi-face mode, largest first
+
+# Near-duplicate frame detection configuration
+DUPLICATE_FRAME_ENABLED = os.getenv("DUPLICATE_FRAME_ENABLED", "true").lower() == "true"
+DUPLICATE_FRAME_MAX_DISTANCE = int(os.getenv("DUPLICATE_FRAME_MAX_DISTANCE", "4"))  # Max differing bits of the 64-bit hash
+DUPLICATE_FRAME_MAX_AGE = float(os.getenv("DUPLICATE_FRAME_MAX_AGE", "30"))  # Seconds before a cached result must be refreshed
+
+# Adaptive capture rate configuration
+CAPTURE_POLICY = os.getenv("CAPTURE_POLICY", "variance")  # "variance" or "fixed"
+CAPTURE_DEFAULT_MS = int(os.getenv("CAPTURE_DEFAULT_MS", "4000"))  # Delay of the fixed policy and until a session has two frames
+CAPTURE_MIN_MS = int(os.getenv("CAPTURE_MIN_MS", "1000"))
+CAPTURE_MAX_MS = int(os.getenv("CAPTURE_MAX_MS", "10000"))
+CAPTURE_VARIANCE_WINDOW = int(os.getenv("CAPTURE_VARIANCE_WINDOW", "5"))  # Recent frames the variance is computed over
+CAPTURE_LOW_VARIANCE = float(os.getenv("CAPTURE_LOW_VARIANCE", "0.002"))  # Summed probability variance treated as stable (max delay)
+CAPTURE_HIGH_VARIANCE = float(os.getenv("CAPTURE_HIGH_VARIANCE", "0.02"))  # Summed probability variance treated as a transition (min delay)
+
+# Streaming endpoint configuration
+STREAM_SMOOTHING_METHOD = os.getenv("STREAM_SMOOTHING_METHOD", "ema")  # "ema" or "window"
+STREAM_SMOOTHING_ALPHA = float(os.getenv("STREAM_SMOOTHING_ALPHA", "0.4"))
+STREAM_SMOOTHING_WINDOW = int(os.getenv("STREAM_SMOOTHING_WINDOW", "5"))
+
+# Session timeline configuration
+TIMELINE_MAX_SAMPLES = int(os.getenv("TIMELINE_MAX_SAMPLES", "10000"))  # Per session, the oldest samples are overwritten beyond this
+TIMELINE_MAX_GAP_SECONDS = float(os.getenv("TIMELINE_MAX_GAP_SECONDS", "10"))  # Longer capture pauses are not counted as time in an emotion
+TIMELINE_STORE_BACKEND = os.getenv("TIMELINE_STORE_BACKEND", os.getenv("SESSION_STORE_BACKEND", "memory"))  # "memory" or "sqlite" (shared by worker processes)
+TIMELINE_STORE_PATH = os.getenv("TIMELINE_STORE_PATH", "timelines.db")
+
+# Grad-CAM explanation configuration
+EXPLAIN_ENABLED = os.getenv("EXPLAIN_ENABLED", "true").lower() == "true"
+EXPLAIN_RECENT_FRAMES = int(os.getenv("EXPLAIN_RECENT_FRAMES", "500"))  # Analyzed frames kept for explanation by analysis_id
+EXPLAIN_OVERLAY_SIZE = int(os.getenv("EXPLAIN_OVERLAY_SIZE", "128"))  # Longest side of the overlay image, in pixels
+EXPLAIN_MAX_BATCH_SIZE = int(os.getenv("EXPLAIN_MAX_BATCH_SIZE", "8"))
+EXPLAIN_MAX_WAIT_MS = float(os.getenv("EXPLAIN_MAX_WAIT_MS", "50"))
+EXPLAIN_WORKERS = int(os.getenv("EXPLAIN_WORKERS", "1"))
+EXPLAIN_CACHE_MAX_BYTES = int(os.getenv("EXPLAIN_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
 
 # Alternative paths for model file
 ALTERNATE_MODEL_PATHS = [
@@ -50,9 +179,19 @@ ALTERNATE_MODEL_PATHS = [
     "./backend/model_resnet50.h5"
 ]
 
-# Interview state management
-used_questions = set()  # Track asked questions to avoid repetition
-interview_started = False  # Track if interview has begun
+# Interview state management - asked questions and opening flag are tracked per session
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory")  # "memory" or "sqlite"
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "sessions.db")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(4 * 3600)))
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+DEFAULT_SESSION_ID = "default"
+
+session_store = create_session_store(
+    SESSION_STORE_BACKEND,
+    path=SESSION_STORE_PATH,
+    max_sessions=SESSION_MAX_COUNT,
+    ttl_seconds=SESSION_TTL_SECONDS
+)
 
 # Fixed opening question for all interviews
 OPENING_QUESTION = "אשמח שתציג/י את עצמך בקצרה ותספר/י על הניסיון המקצועי שלך."
@@ -62,29 +201,177 @@ def load_emotion_model():
     Load the pre-trained emotion recognition model (ResNet50)
     Tries multiple paths to find the model file
     """
-    global model
+    limit_inference_threads()
     
+    if INFERENCE_BACKEND == "tflite":
+        return load_tflite_model()
+    if INFERENCE_BACKEND != "keras":
+        logger.warning("Unknown inference backend '%s', using keras", INFERENCE_BACKEND)
+    
+    return load_first_model_file(load_model_file)
+
+def load_first_model_file(load_fn):
+    """Call load_fn on MODEL_PATH, then on each alternative path, until one loads"""
     try:
-        print(f"Attempting to load model from: {MODEL_PATH}")
-        with tf.keras.utils.custom_object_scope(custom_objects):
-            model = load_model(MODEL_PATH)
-        print(f"Model loaded successfully from: {MODEL_PATH}")
-        return model
+        logger.info("Attempting to load model from: %s", MODEL_PATH)
+        return load_fn(MODEL_PATH)
     except Exception as e:
-        print(f"Error loading model from primary path: {str(e)}")
+        logger.warning("Error loading model from primary path: %s", e)
         
         # Try alternative paths
         for alt_path in ALTERNATE_MODEL_PATHS:
             try:
-                print(f"Trying alternative path: {alt_path}")
-                model = load_model(alt_path)
-                print(f"Model loaded successfully from: {alt_path}")
-                return model
+                logger.info("Trying alternative path: %s", alt_path)
+                return load_fn(alt_path)
             except Exception as alt_e:
-                print(f"Error loading from {alt_path}: {str(alt_e)}")
+                logger.warning("Error loading from %s: %s", alt_path, alt_e)
         
         raise Exception("Cannot load model from any available paths")
 
+def limit_inference_threads():
+    """
+    Cap TensorFlow and OpenCV thread pools so several worker processes don't oversubscribe the cores
+    TensorFlow only accepts this before it runs its first op
+    """
+    if not INFERENCE_THREADS:
+        return
+    cv2.setNumThreads(INFERENCE_THREADS)
+    if INFERENCE_BACKEND == "tflite":
+        return
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(INFERENCE_THREADS)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except RuntimeError as e:
+        logger.debug("TensorFlow thread limits already fixed: %s", e)
+
+def load_keras_model(path):
+    """Load a Keras model file with the custom layers registered"""
+    with tf.keras.utils.custom_object_scope(get_custom_objects()):
+        return tf.keras.models.load_model(path)
+
+def load_model_file(path):
+    """
+    Load one model file and prepare inference on it
+    Restores the SavedModel cache of the file when there is one. Otherwise the
+    h5 file is loaded and the cache is written on a background thread
+    """
+    global model
+    
+    if MODEL_CACHE_DIR:
+        cached = load_cached_model(path, MODEL_CACHE_DIR)
+        if cached is not None:
+            restored, input_shape = cached
+            prepare_inference(restored, input_shape=input_shape, forward=restored.serve)
+            return restored
+    
+    model = load_keras_model(path)
+    logger.info("Model loaded successfully from: %s", path)
+    prepare_inference(model)
+    
+    if MODEL_CACHE_DIR:
+        threading.Thread(
+            target=save_cached_model,
+            args=(model, path, MODEL_CACHE_DIR),
+            name="model-cache",
+            daemon=False  # Let the export finish even if the process is exiting
+        ).start()
+    return model
+
+def load_tflite_model():
+    """
+    Load the quantized TFLite model exported by convert_tflite.py
+    The Keras model is not loaded at all in this mode
+    """
+    global predictor, model_input_shape
+    
+    logger.info("Loading TFLite model from: %s (threads: %d)", TFLITE_MODEL_PATH, TFLITE_NUM_THREADS)
+    tflite_predictor = TFLitePredictor(
+        TFLITE_MODEL_PATH,
+        num_threads=TFLITE_NUM_THREADS,
+        max_batch_size=INFERENCE_MAX_BATCH_SIZE
+    )
+    tflite_predictor.warmup()
+    model_input_shape = tflite_predictor.input_shape
+    predictor = tflite_predictor
+    logger.info("Model expects shape: %s", model_input_shape)
+    return predictor
+
+def ensure_model_loaded():
+    """
+    Load the model on first use if it was not loaded at startup
+    Waits for a background load in progress instead of starting a second one
+    """
+    loader = model_loader
+    if predictor is None and loader is not None and loader.is_alive():
+        loader.join()
+    if predictor is None:
+        load_emotion_model()
+    return predictor
+
+def start_model_loader():
+    """
+    Load and warm the model on a background thread
+    No-op once the model is ready, while a load is running, or shortly after a failed one
+    """
+    global model_loader
+    
+    with model_loader_lock:
+        if predictor is not None or (model_loader is not None and model_loader.is_alive()):
+            return model_loader
+        failed_at = model_status['failed_at']
+        if failed_at is not None and time.monotonic() - failed_at < MODEL_LOAD_RETRY_SECONDS:
+            return model_loader
+        
+        model_status.update(state='loading', error=None)
+        model_loader = threading.Thread(target=load_model_in_background, name="model-loader", daemon=True)
+        model_loader.start()
+        return model_loader
+
+def load_model_in_background():
+    started = time.perf_counter()
+    try:
+        load_emotion_model()
+    except Exception as e:
+        logger.exception("Background model loading failed: %s", e)
+        model_status.update(state='failed', error=str(e), failed_at=time.monotonic())
+        return
+    model_status.update(state='ready', failed_at=None, load_seconds=round(time.perf_counter() - started, 3))
+    logger.info("Model ready after %.1fs", model_status['load_seconds'])
+
+def model_not_ready_response():
+    """
+    503 response for inference requests while the model is loading in the background,
+    or None when requests may proceed. Also restarts a failed background load
+    """
+    if predictor is not None or not MODEL_BACKGROUND_LOAD:
+        return None
+    start_model_loader()
+    response = jsonify({
+        'error': 'Emotion model is still loading, please retry shortly',
+        'model_state': model_status['state']
+    })
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+def prepare_inference(loaded_model, input_shape=None, forward=None):
+    """
+    Build the compiled inference function for a freshly loaded model
+    and warm it for every batch size the scheduler can produce
+    """
+    global predictor, model_input_shape
+    
+    compiled = CompiledPredictor(
+        loaded_model,
+        max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+        input_shape=input_shape,
+        forward=forward
+    )
+    compiled.warmup()
+    model_input_shape = compiled.input_shape
+    predictor = compiled
+    logger.info("Model expects shape: %s", model_input_shape)
+    return predictor
+
 # Question banks categorized by emotion type
 emotion_category_questions = {
     'Positive Emotion': [
@@ -216,125 +503,172 @@ def preprocess_image(image_data):
     """
     Preprocess image for emotion recognition model
     Resizes to 48x48, handles color channels, normalizes pixel values
+    Expects a BGR (OpenCV) or grayscale image. The model is fed the same tensor as the
+    original PIL-based pipeline, which decoded to RGB and then applied COLOR_BGR2RGB:
+    BGR-ordered channels, and grayscale computed from them with RGB2GRAY weights
     """
     try:
-        print(f"Original image size: {image_data.shape}")
+        logger.debug("Original image size: %s", image_data.shape)
         img = cv2.resize(image_data, (48, 48))
-        print(f"Resized image to: {img.shape}")
+        logger.debug("Resized image to: %s", img.shape)
         
-        # Handle color conversion if needed
-        if len(img.shape) == 3 and img.shape[2] == 3:
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            print("Converted from BGR to RGB")
+        # Channels stay in BGR order, which is the order the original pipeline fed the model
         
-        # Handle channel requirements based on model input shape
-        input_shape = model.input_shape
-        print(f"Model expects shape: {input_shape}")
-        
-        if len(input_shape) > 1:
-            expected_channels = input_shape[-1]
+        # Handle channel requirements based on the cached model input shape
+        if len(model_input_shape) > 1:
+            expected_channels = model_input_shape[-1]
             if expected_channels == 1 and len(img.shape) == 3 and img.shape[2] == 3:
-                img = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+                img = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)  # RGB weights on BGR data, as in the original pipeline
+                img = np.expand_dims(img, axis=-1)
+                logger.debug("Converted to grayscale with single channel")
+            elif expected_channels == 1 and len(img.shape) == 2:
                 img = np.expand_dims(img, axis=-1)
-                print("Converted to grayscale with single channel")
+                logger.debug("Added single channel to grayscale image")
             elif expected_channels == 3 and (len(img.shape) == 2 or img.shape[2] == 1):
                 img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
-                print("Converted from grayscale to RGB")
+                logger.debug("Converted from grayscale to RGB")
         
         # Normalize pixel values and add batch dimension
         img = img.astype('float32') / 255.0
         img = np.expand_dims(img, axis=0)
-        print(f"Final image shape for model: {img.shape}")
+        logger.debug("Final image shape for model: %s", img.shape)
         return img
     except Exception as e:
-        print(f"Error in image preprocessing: {str(e)}")
+        logger.error("Error in image preprocessing: %s", e)
         raise
 
-def is_question_used(question):
-    """Check if a question has already been asked in current interview"""
-    return question in used_questions
+def is_question_used(question, session_id=DEFAULT_SESSION_ID):
+    """Check if a question has already been asked in the session's interview"""
+    return question in session_store.get_used_questions(session_id)
+
+# Hebrew emotion names used in LLaMA prompts
+emotion_hebrew_names = {
+    'happy': 'שמחה',
+    'surprise': 'הפתעה', 
+    'neutral': 'ניטרליות',
+    'angry': 'כעס',
+    'disgust': 'גועל',
+    'fear': 'פחד',
+    'sad': 'עצב'
+}
+
+def get_emotion_category(emotion):
+    """Map a specific emotion to its question category"""
+    return "Negative Emotion" if emotion in negative_emotions else "Positive Emotion"
+
+def get_confidence_bucket(confidence):
+    """Quantize a confidence value to the lower bound of its bucket (e.g. 0.73 -> 0.7)"""
+    buckets = int(round(1 / QUESTION_CONFIDENCE_BUCKET))
+    index = min(max(int(confidence * buckets), 0), buckets - 1)
+    return round(index / buckets, 4)
+
+def build_llama_prompt(emotion, confidence):
+    """Format the LLaMA prompt for an emotion and (bucketed) confidence"""
+    # Select appropriate prompt template
+    emotion_category = get_emotion_category(emotion)
+    prompt_template = emotion_prompt_templates.get(
+        emotion_category, 
+        emotion_prompt_templates['Positive Emotion']
+    )
+    
+    # Format prompt with emotion and confidence
+    return prompt_template.format(
+        emotion=emotion_hebrew_names.get(emotion, emotion),
+        confidence=f"{confidence * 100:.0f}"
+    )
+
+def record_llama_attempt(outcome, seconds):
+    """Record the latency and outcome of one LLaMA API attempt"""
+    LLAMA_LATENCY.observe(seconds, outcome=outcome)
+    LLAMA_ATTEMPTS.inc(outcome=outcome)
 
-def get_llama_question(emotion, emotion_category, confidence, max_attempts=3):
+def record_llama_circuit(is_open):
+    LLAMA_CIRCUIT_OPEN.set(1 if is_open else 0)
+
+# LLaMA API client - keep-alive connections shared by the question pool workers
+llama_client = LlamaClient(
+    LLAMA_API_URL,
+    api_key=LLAMA_API_KEY,
+    max_tokens=LLAMA_MAX_TOKENS,
+    temperature=LLAMA_TEMPERATURE,
+    budget_seconds=LLAMA_BUDGET_SECONDS,
+    connect_timeout=LLAMA_CONNECT_TIMEOUT,
+    pool_size=QUESTION_POOL_WORKERS,
+    hedge_after_seconds=LLAMA_HEDGE_AFTER_MS / 1000.0,
+    failure_threshold=LLAMA_BREAKER_FAILURES,
+    slow_call_seconds=LLAMA_BREAKER_SLOW_SECONDS,
+    probe_interval=LLAMA_BREAKER_PROBE_SECONDS,
+    on_attempt=record_llama_attempt,
+    on_state_change=record_llama_circuit
+)
+
+# Persistent cache of LLaMA generations, shared across interviews
+question_cache = QuestionCache(QUESTION_CACHE_PATH, max_bytes=QUESTION_CACHE_MAX_BYTES) if QUESTION_CACHE_ENABLED else None
+
+def generate_pool_question(key, stocked):
     """
-    Get adaptive question from LLaMA API based on detected emotion
-    Ensures no question repetition within same interview
+    Question pool worker: produce a question for an (emotion, confidence bucket) key
+    Reuses cached generations for the same prompt and only calls the API
+    until QUESTION_CACHE_VARIANTS distinct questions are cached
     """
-    global interview_started
+    emotion, bucket = key
+    prompt = build_llama_prompt(emotion, bucket)
+    if question_cache is None:
+        with timed_stage('llama_call'):
+            return llama_client.generate(prompt, exclude=stocked)
     
+    cache_key = prompt_key(prompt, LLAMA_API_URL, LLAMA_MAX_TOKENS, LLAMA_TEMPERATURE)
+    cached = question_cache.get(cache_key)
+    candidates = [q for q in cached if q not in stocked]
+    if candidates and len(cached) >= QUESTION_CACHE_VARIANTS:
+        return random.choice(candidates)
+    
+    with timed_stage('llama_call'):
+        question = llama_client.generate(prompt, exclude=set(stocked) | set(cached))
+    
+    if question:
+        question_cache.add(cache_key, question)
+        return question
+    
+    # API unavailable or circuit open - serve a cached variant if there is one
+    return random.choice(candidates) if candidates else None
+
+# Background pool of pre-generated LLaMA questions
+question_pool = QuestionPool(
+    generate_pool_question,
+    stock_size=QUESTION_POOL_STOCK_SIZE,
+    max_workers=QUESTION_POOL_WORKERS
+)
+
+def prefill_question_pool():
+    """Start stocking questions for every emotion at its detection threshold"""
+    for emotion, threshold in emotion_thresholds.items():
+        question_pool.refill((emotion, get_confidence_bucket(threshold)))
+
+def get_llama_question(emotion, emotion_category, confidence, session_id=DEFAULT_SESSION_ID):
+    """
+    Get adaptive question from the pre-generated LLaMA question pool
+    Ensures no question repetition within same interview
+    """
     # Return opening question for new interviews
-    if not interview_started:
-        interview_started = True
-        used_questions.add(OPENING_QUESTION)
+    if session_store.start_interview(session_id):
+        session_store.add_used_question(session_id, OPENING_QUESTION)
+        QUESTIONS.inc(source="opening")
         return OPENING_QUESTION
     
-    try:
-        for attempt in range(max_attempts):
-            # Select appropriate prompt template
-            prompt_template = emotion_prompt_templates.get(
-                emotion_category, 
-                emotion_prompt_templates['Positive Emotion']
-            )
-            
-            # Format prompt with emotion and confidence
-            emotion_hebrew = {
-                'happy': 'שמחה',
-                'surprise': 'הפתעה', 
-                'neutral': 'ניטרליות',
-                'angry': 'כעס',
-                'disgust': 'גועל',
-                'fear': 'פחד',
-                'sad': 'עצב'
-            }.get(emotion, emotion)
-            
-            prompt = prompt_template.format(
-                emotion=emotion_hebrew,
-                confidence=confidence * 100
-            )
-            
-            # Configure API request
-            headers = {"Authorization": f"Bearer {LLAMA_API_KEY}"}
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": LLAMA_MAX_TOKENS,
-                    "temperature": LLAMA_TEMPERATURE,
-                    "return_full_text": False
-                }
-            }
-            
-            # Send request to LLaMA API
-            response = requests.post(LLAMA_API_URL, headers=headers, json=payload, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Extract generated text from response
-                if isinstance(result, list) and len(result) > 0:
-                    generated_text = result[0].get('generated_text', '')
-                elif isinstance(result, dict):
-                    generated_text = result.get('generated_text', '')
-                else:
-                    generated_text = str(result)
-                
-                generated_text = generated_text.strip()
-                
-                # Check if question is unique and not empty
-                if generated_text and not is_question_used(generated_text):
-                    used_questions.add(generated_text)
-                    return generated_text
-                
-                print(f"Attempt {attempt+1}: Question already used or empty. Retrying.")
-            else:
-                print(f"LLaMA API error. Status: {response.status_code}, Content: {response.text}")
-        
-        # Fallback to predefined questions if LLaMA fails
-        return get_fallback_question(emotion_category)
-        
-    except Exception as e:
-        print(f"Error calling LLaMA API: {str(e)}. Using fallback questions.")
-        return get_fallback_question(emotion_category)
+    # Take a question from stock; generation happens in the background
+    key = (emotion, get_confidence_bucket(confidence))
+    used_questions = session_store.get_used_questions(session_id)
+    question = question_pool.take(key, exclude=used_questions)
+    if question and session_store.add_used_question(session_id, question):
+        QUESTIONS.inc(source="pool")
+        return question
+    
+    # Fallback to predefined questions while the stock is empty
+    logger.debug("No pre-generated question in stock for %s. Using fallback questions.", key)
+    return get_fallback_question(emotion_category, session_id)
 
-def get_fallback_question(emotion_category):
+def get_fallback_question(emotion_category, session_id=DEFAULT_SESSION_ID):
     """
     Get random question from predefined question bank
     Filters out already used questions
@@ -345,40 +679,165 @@ def get_fallback_question(emotion_category):
     )
     
     # Filter out used questions
-    unused_questions = [q for q in questions if not is_question_used(q)]
+    used_questions = session_store.get_used_questions(session_id)
+    unused_questions = [q for q in questions if q not in used_questions]
     
     # Reset used questions if all have been asked (except opening question)
     if not unused_questions:
-        opening = OPENING_QUESTION
-        used_questions.clear()
-        if opening in used_questions:
-            used_questions.add(opening)
+        session_store.clear_used_questions(session_id, keep={OPENING_QUESTION})
         unused_questions = questions
     
     # Select random unused question
     selected_question = random.choice(unused_questions)
-    used_questions.add(selected_question)
+    session_store.add_used_question(session_id, selected_question)
+    QUESTIONS.inc(source="fallback")
     return selected_question
 
-def analyze_emotion(image_data):
+def predict_batch(batch):
+    """Run a batch of preprocessed frames through the compiled model function"""
+    INFERENCE_BATCH_SIZE.observe(len(batch))
+    with timed_stage('model_forward'):
+        return predictor(batch)
+
+# Shared scheduler that batches frames from concurrent requests
+inference_batcher = MicroBatcher(
+    predict_batch,
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=INFERENCE_MAX_WAIT_MS
+)
+
+# Per-session face trackers (process-local)
+face_detector = FaceDetector()
+face_trackers = LRUCache(max_size=SESSION_MAX_COUNT, ttl_seconds=SESSION_TTL_SECONDS)
+
+def locate_face(image_data, session_id=DEFAULT_SESSION_ID, region=FULL_REGION):
     """
-    Main emotion analysis function
-    Processes image, predicts emotions, and generates appropriate question
+    Locate the face using the session's tracker
+    The full detector only runs every FACE_REDETECT_INTERVAL frames or when tracking confidence drops
     """
-    global model
-    if model is None:
-        model = load_emotion_model()
-    
-    # Preprocess image for model
-    processed_img = preprocess_image(image_data)
+    tracker = face_trackers.get_or_create(session_id, lambda: FaceTracker(
+        face_detector,
+        redetect_interval=FACE_REDETECT_INTERVAL,
+        min_confidence=FACE_TRACK_MIN_CONFIDENCE
+    ))
+    try:
+        return tracker.locate(image_data, region)
+    except Exception as e:
+        log_face_detection_failure(e)
+        return None, None, None, 0.0
+
+face_detection_failure_logged = False
+
+def log_face_detection_failure(error):
+    """Warn once that face localization is broken; frames are analyzed in full instead"""
+    global face_detection_failure_logged
     
-    # Predict emotions
-    print("Performing emotion prediction...")
-    probs = model.predict(processed_img)[0]
-    emotion_labels = list(emotion_thresholds.keys())
-    detected_emotions = {emotion_labels[i]: float(probs[i]) for i in range(len(probs))}
-    print(f"Detected emotions: {detected_emotions}")
+    if not face_detection_failure_logged:
+        face_detection_failure_logged = True
+        logger.warning("Face detection failed, analyzing full frames: %s", error, exc_info=True)
+    else:
+        logger.debug("Face detection failed: %s", error)
+
+def crop_face(image_data, pixel_box):
+    """Crop the face ROI (plus a margin) out of the frame"""
+    height, width = image_data.shape[:2]
+    x, y, w, h = expand_box(pixel_box, FACE_CROP_MARGIN, width, height)
+    return image_data[y:y + h, x:x + w]
+
+def format_face_box(box):
+    """Normalized face box for API responses (fractions of the full frame)"""
+    if box is None:
+        return None
+    x, y, w, h = box
+    return {'x': round(x, 4), 'y': round(y, 4), 'width': round(w, 4), 'height': round(h, 4)}
+
+# Per-session cache of the last analyzed frame's fingerprint and probabilities
+duplicate_frames = DuplicateFrameFilter(
+    max_distance=DUPLICATE_FRAME_MAX_DISTANCE,
+    max_age_seconds=DUPLICATE_FRAME_MAX_AGE,
+    max_sessions=SESSION_MAX_COUNT,
+    ttl_seconds=SESSION_TTL_SECONDS
+)
+
+# Per-session emotion timelines, recorded for every analyzed frame
+EMOTION_CATEGORIES = ["Positive Emotion", "Negative Emotion"]
+timelines = create_timeline_store(
+    TIMELINE_STORE_BACKEND,
+    emotion_thresholds.keys(),
+    EMOTION_CATEGORIES,
+    path=TIMELINE_STORE_PATH,
+    max_samples=TIMELINE_MAX_SAMPLES,
+    max_sessions=SESSION_MAX_COUNT,
+    ttl_seconds=SESSION_TTL_SECONDS
+)
+
+def record_timeline(session_id, probs, classified_emotion, category):
+    timelines.append(session_id, probs, classified_emotion, category)
+
+# Per-session capture policies - recommend when the client should send its next frame
+capture_policies = LRUCache(max_size=SESSION_MAX_COUNT, ttl_seconds=SESSION_TTL_SECONDS)
+
+def recommend_capture_delay(session_id, detected_emotions):
+    """Delay in ms until the session's next capture, from its recent emotion probabilities"""
+    policy = capture_policies.get_or_create(session_id, lambda: create_capture_policy(
+        CAPTURE_POLICY,
+        default_ms=CAPTURE_DEFAULT_MS,
+        min_ms=CAPTURE_MIN_MS,
+        max_ms=CAPTURE_MAX_MS,
+        window=CAPTURE_VARIANCE_WINDOW,
+        low_variance=CAPTURE_LOW_VARIANCE,
+        high_variance=CAPTURE_HIGH_VARIANCE
+    ))
+    delay_ms = policy.update(detected_emotions)
+    CAPTURE_DELAY.observe(delay_ms / 1000.0, policy=policy.name)
+    return delay_ms
+
+# Grad-CAM explanations - inputs of recent analyses are kept so they can be explained on demand
+recent_analyses = LRUCache(max_size=EXPLAIN_RECENT_FRAMES, ttl_seconds=SESSION_TTL_SECONDS)
+explanation_model = None  # Keras model for gradients when inference runs on TFLite or the SavedModel cache
+explanation_model_lock = threading.Lock()
+
+def get_explanation_model():
+    """
+    Keras model for Grad-CAM - the serving model when it is a Keras model, otherwise
+    loaded from MODEL_PATH or the first alternative path that loads, like the serving model
+    """
+    global explanation_model
     
+    if model is not None:
+        return model
+    with explanation_model_lock:
+        if explanation_model is None:
+            logger.info("Loading Keras model for explanations")
+            explanation_model = load_first_model_file(load_keras_model)
+        return explanation_model
+
+explainer = GradCamExplainer(
+    get_explanation_model,
+    max_batch_size=EXPLAIN_MAX_BATCH_SIZE,
+    max_wait_ms=EXPLAIN_MAX_WAIT_MS,
+    workers=EXPLAIN_WORKERS,
+    cache_max_bytes=EXPLAIN_CACHE_MAX_BYTES
+)
+
+def remember_analysis(analysis_id, processed_img, face_image, classified_emotion):
+    """Keep the model input and a small copy of the analyzed image for a later explanation"""
+    height, width = face_image.shape[:2]
+    scale = min(1.0, EXPLAIN_OVERLAY_SIZE / max(height, width))
+    if scale < 1.0:
+        face_image = cv2.resize(face_image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                                interpolation=cv2.INTER_AREA)
+    recent_analyses.set(analysis_id, {
+        'tensor': processed_img[0].astype(np.float16),
+        'image': face_image if scale < 1.0 else face_image.copy(),
+        'class_index': list(emotion_thresholds.keys()).index(classified_emotion)
+    })
+
+def classify_emotions(detected_emotions):
+    """
+    Apply the per-emotion thresholds to a probability dict
+    Returns (classified_emotion, category, confidence)
+    """
     # Find highest confidence emotions by category
     max_positive_prob = 0
     max_negative_prob = 0
@@ -391,8 +850,8 @@ def analyze_emotion(image_data):
             if prob > max_negative_prob:
                 max_negative_prob = prob
     
-    print(f"Max positive emotion confidence: {max_positive_prob}")
-    print(f"Max negative emotion confidence: {max_negative_prob}")
+    logger.debug("Max positive emotion confidence: %s", max_positive_prob)
+    logger.debug("Max negative emotion confidence: %s", max_negative_prob)
     
     # Determine final emotion category and specific emotion
     if max_positive_prob > max_negative_prob and max_positive_prob > 0:
@@ -414,33 +873,283 @@ def analyze_emotion(image_data):
         classified_emotion = "neutral"
         confidence = detected_emotions['neutral']
     
-    print(f"Final classified emotion: {classified_emotion}, Category: {category}, Confidence: {confidence}")
+    logger.debug("Final classified emotion: %s, Category: %s, Confidence: %s", classified_emotion, category, confidence)
+    return classified_emotion, category, float(confidence)
+
+def analyze_frame(image_data, session_id=DEFAULT_SESSION_ID, region=FULL_REGION, deadline=None, record=True):
+    """
+    Emotion recognition for one frame, without question generation
+    `region` is the normalized part of the full frame the image covers when the client sent a crop.
+    Raises DeadlineExceeded instead of running inference once the monotonic `deadline` has passed.
+    With record=False the frame is not added to the session timeline
+    """
+    ensure_model_loaded()
     
-    # Generate appropriate question using LLaMA or fallback
-    try:
-        suggested_question = get_llama_question(classified_emotion, category, confidence)
-        print(f"Generated question: {suggested_question}")
-    except Exception as e:
-        print(f"Error getting LLaMA question: {str(e)}. Using fallback.")
-        suggested_question = get_fallback_question(category)
-        print(f"Fallback question from category {category}: {suggested_question}")
+    # Localize the face so the model sees the face rather than the whole frame
+    face_box, face_source = None, None
+    if FACE_DETECTION_ENABLED:
+        with timed_stage('face_localization'):
+            pixel_box, face_box, face_source, _ = locate_face(image_data, session_id, region)
+        if pixel_box is not None:
+            image_data = crop_face(image_data, pixel_box)
+            logger.debug("Face %s at %s", face_source, face_box)
+        else:
+            logger.debug("No face found, analyzing the full frame")
+    
+    # Preprocess image for model (resize and colour conversion)
+    with timed_stage('preprocess'):
+        processed_img = preprocess_image(image_data)
+    
+    # Reuse the last result when the frame is a near-duplicate of the last analyzed one
+    probs = None
+    if DUPLICATE_FRAME_ENABLED:
+        with timed_stage('fingerprint'):
+            fingerprint = difference_hash(processed_img)
+        probs = duplicate_frames.lookup(session_id, fingerprint)
+    cached_result = probs is not None
+    
+    # Predict emotions
+    if cached_result:
+        logger.debug("Near-duplicate frame, reusing cached emotion probabilities")
+        FRAMES.inc(path="cached")
+    else:
+        logger.debug("Performing emotion prediction...")
+        with timed_stage('inference'):
+            probs = inference_batcher.submit(processed_img, deadline=deadline)[0]
+        FRAMES.inc(path="inference")
+        if DUPLICATE_FRAME_ENABLED:
+            duplicate_frames.store(session_id, fingerprint, probs)
+    emotion_labels = list(emotion_thresholds.keys())
+    detected_emotions = {emotion_labels[i]: float(probs[i]) for i in range(len(probs))}
+    logger.debug("Detected emotions: %s", detected_emotions)
+    
+    with timed_stage('classification'):
+        classified_emotion, category, confidence = classify_emotions(detected_emotions)
+    if record:
+        record_timeline(session_id, probs, classified_emotion, category)
+    
+    analysis_id = uuid.uuid4().hex
+    if EXPLAIN_ENABLED:
+        remember_analysis(analysis_id, processed_img, image_data, classified_emotion)
     
     return {
+        'analysis_id': analysis_id,
         'classified_emotion': classified_emotion,
         'category': category,
-        'confidence': float(confidence),
+        'confidence': confidence,
         'detected_emotions': detected_emotions,
-        'suggested_question': suggested_question
+        'face_box': format_face_box(face_box),
+        'face_source': face_source,
+        'cached_result': cached_result
     }
 
+def analyze_faces(image_data, session_id=DEFAULT_SESSION_ID, region=FULL_REGION, deadline=None, record=True):
+    """
+    Multi-face emotion recognition for panel and group interviews
+    Every detected face (up to MULTI_FACE_MAX_FACES, largest first) is cropped and all crops
+    go through the model as one batch. Returns the analyze_frame result of the largest face
+    with a 'faces' list of per-face results; only the largest face is added to the timeline.
+    Without any detected face the full frame is analyzed and 'faces' is empty
+    """
+    ensure_model_loaded()
+    
+    with timed_stage('face_localization'):
+        try:
+            pixel_boxes = face_detector.detect(to_grayscale(image_data))[:MULTI_FACE_MAX_FACES]
+        except Exception as e:
+            log_face_detection_failure(e)
+            pixel_boxes = []
+    if not pixel_boxes:
+        logger.debug("No faces found, analyzing the full frame")
+        result = analyze_frame(image_data, session_id, region, deadline, record)
+        result['faces'] = []
+        return result
+    
+    height, width = image_data.shape[:2]
+    face_images = [crop_face(image_data, pixel_box) for pixel_box in pixel_boxes]
+    with timed_stage('preprocess'):
+        processed_imgs = np.concatenate([preprocess_image(face_image) for face_image in face_images])
+    
+    # One batched forward pass for all faces
+    logger.debug("Performing emotion prediction for %d faces...", len(face_images))
+    with timed_stage('inference'):
+        probs_batch = inference_batcher.submit(processed_imgs, deadline=deadline)
+    FRAMES.inc(path="inference")
+    
+    emotion_labels = list(emotion_thresholds.keys())
+    faces = []
+    with timed_stage('classification'):
+        for index, probs in enumerate(probs_batch):
+            detected_emotions = {emotion_labels[i]: float(probs[i]) for i in range(len(probs))}
+            classified_emotion, category, confidence = classify_emotions(detected_emotions)
+            analysis_id = uuid.uuid4().hex
+            if EXPLAIN_ENABLED:
+                remember_analysis(analysis_id, processed_imgs[index:index + 1], face_images[index], classified_emotion)
+            faces.append({
+                'analysis_id': analysis_id,
+                'classified_emotion': classified_emotion,
+                'category': category,
+                'confidence': confidence,
+                'detected_emotions': detected_emotions,
+                'face_box': format_face_box(normalize_box(pixel_boxes[index], region, width, height))
+            })
+    if record:
+        record_timeline(session_id, probs_batch[0], faces[0]['classified_emotion'], faces[0]['category'])
+    
+    result = dict(faces[0], face_source='detected', cached_result=False)
+    result['faces'] = faces
+    return result
+
+def suggest_question(classified_emotion, category, confidence, session_id=DEFAULT_SESSION_ID):
+    """Generate appropriate question using LLaMA or fallback"""
+    try:
+        with timed_stage('question'):
+            suggested_question = get_llama_question(classified_emotion, category, confidence, session_id)
+        logger.debug("Generated question: %s", suggested_question)
+    except Exception as e:
+        logger.warning("Error getting LLaMA question: %s. Using fallback.", e)
+        suggested_question = get_fallback_question(category, session_id)
+        logger.debug("Fallback question from category %s: %s", category, suggested_question)
+    return suggested_question
+
+def analyze_emotion(image_data, session_id=DEFAULT_SESSION_ID, region=FULL_REGION, deadline=None, multi_face=False):
+    """
+    Main emotion analysis function
+    Processes image, predicts emotions, and generates appropriate question
+    With multi_face=True every face is analyzed and the question follows the largest one
+    """
+    if multi_face:
+        result = analyze_faces(image_data, session_id, region, deadline)
+    else:
+        result = analyze_frame(image_data, session_id, region, deadline)
+    result['suggested_question'] = suggest_question(
+        result['classified_emotion'],
+        result['category'],
+        result['confidence'],
+        session_id
+    )
+    return result
+
 # API Endpoints
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    """Record end-to-end latency of every API request"""
+    started = g.get('request_started')
+    if started is not None and request.endpoint:
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started,
+            endpoint=request.endpoint,
+            status=response.status_code
+        )
+    return response
+
+def get_session_id():
+    """
+    Read the interview session id sent by the client
+    Accepts an X-Session-ID header, a session_id form/query field or a JSON body field
+    """
+    session_id = (
+        request.headers.get('X-Session-ID')
+        or request.values.get('session_id')
+        or (request.get_json(silent=True) or {}).get('session_id')
+    )
+    return str(session_id)[:128] if session_id else DEFAULT_SESSION_ID
+
+def get_uploaded_image_bytes():
+    """
+    Encoded image bytes of the current request, or None when it carries no image
+    Accepts a raw binary body, a multipart file upload or a base64 form field
+    """
+    if request.mimetype in RAW_IMAGE_MIMETYPES:
+        # Process raw binary body (e.g. Content-Type: image/jpeg)
+        logger.debug("Image received as raw binary body")
+        return request.get_data(cache=False)
+    if 'image' in request.files:
+        # Process image from file upload (multipart bytes)
+        logger.debug("Image received as file upload")
+        return request.files['image'].read()
+    if 'image' in request.form:
+        # Process base64 encoded image
+        logger.debug("Image received as base64")
+        image_data = request.form['image']
+        if ',' in image_data:
+            header, image_b64 = image_data.split(',', 1)
+        else:
+            image_b64 = image_data
+        with timed_stage('base64_decode'):
+            return base64.b64decode(image_b64)
+    return None
+
+def decode_image_bytes(img_bytes):
+    """
+    Decode uploaded image bytes into the BGR array analyze_emotion expects
+    Always decoded in colour, since OpenCV's grayscale decoding weights the channels
+    differently from the grayscale preprocess_image gives a single-channel model
+    """
+    with timed_stage('image_decode'):
+        return decode_frame(img_bytes, min_side=FRAME_DECODE_MIN_SIDE)
+
+def get_crop_region():
+    """
+    Read the optional crop_box field: the normalized 'x,y,width,height' region
+    of the full frame that an uploaded crop covers
+    """
+    return parse_crop_region(request.values.get('crop_box'))
+
+def parse_crop_region(value):
+    """Parse a normalized 'x,y,width,height' crop region, defaulting to the full frame"""
+    if not value:
+        return FULL_REGION
+    x, y, w, h = (float(v) for v in value.split(','))
+    if w <= 0 or h <= 0 or x < 0 or y < 0 or x + w > 1.0001 or y + h > 1.0001:
+        raise ValueError(f"Invalid crop_box: {value}")
+    return x, y, w, h
+
+# Admission control - one frame per session at a time, bounded global concurrency
+admission = AdmissionController(
+    max_concurrent=ANALYZE_MAX_CONCURRENT,
+    max_waiting=ANALYZE_MAX_WAITING,
+    max_sessions=SESSION_MAX_COUNT,
+    ttl_seconds=SESSION_TTL_SECONDS
+)
+SHED_STATUS_CODES = {'superseded': 409, 'overloaded': 503, 'deadline_exceeded': 504}
+
+def get_request_deadline():
+    """
+    Monotonic deadline of the current request
+    Clients send their budget in X-Request-Deadline-Ms, e.g. the time until their next capture
+    """
+    try:
+        budget_ms = float(request.headers.get('X-Request-Deadline-Ms', ANALYZE_DEADLINE_MS))
+    except ValueError:
+        budget_ms = ANALYZE_DEADLINE_MS
+    budget_ms = min(max(budget_ms, 0.0), ANALYZE_MAX_DEADLINE_MS)
+    return time.monotonic() + budget_ms / 1000.0
+
+def shed_response(shed):
+    """Response for a request dropped by admission control - 409 superseded, 503 overloaded, 504 deadline"""
+    REQUESTS_SHED.inc(endpoint=request.path, reason=shed.reason)
+    logger.debug("Shed analysis request (%s): %s", shed.reason, shed)
+    response = jsonify({'status': shed.reason, 'error': str(shed)})
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    if shed.reason == 'overloaded':
+        response.headers['Retry-After'] = '1'
+    return response, SHED_STATUS_CODES.get(shed.reason, 503)
+
 @app.route('/api/reset-interview', methods=['POST'])
 def reset_interview():
     """Reset interview state for new interview session"""
-    global used_questions, interview_started
-    used_questions.clear()
-    interview_started = False
+    session_id = get_session_id()
+    session_store.reset(session_id)
+    face_trackers.pop(session_id)
+    duplicate_frames.forget(session_id)
+    timelines.pop(session_id)
+    capture_policies.pop(session_id)
     return jsonify({
         'status': 'success',
         'message': 'Interview state reset successfully. Next interview will start with opening question.'
@@ -451,64 +1160,241 @@ def analyze_screenshot():
     """
     Main endpoint for emotion analysis
     Accepts image data and returns emotion analysis with suggested question
+    Pass multi_face=true (query or form field) to also get a per-face 'faces' list
+    next_capture_ms in the response is the recommended delay until the client's next capture
     """
     # Handle CORS preflight requests
     if request.method == 'OPTIONS':
         response = Response()
         response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Accept')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Accept,X-Session-ID,X-Request-Deadline-Ms')
         response.headers.add('Access-Control-Allow-Methods', 'POST,OPTIONS')
         return response
+    
+    not_ready = model_not_ready_response()
+    if not_ready is not None:
+        return not_ready
         
+    deadline = get_request_deadline()
     try:
-        print(f"Received {request.method} request for image analysis")
+        logger.debug("Received %s request for image analysis", request.method)
         
         # Validate image data in request
-        if 'image' not in request.files and 'image' not in request.form:
-            print("Error: No image data received")
+        img_bytes = get_uploaded_image_bytes()
+        if not img_bytes:
+            logger.warning("No image data received")
             return jsonify({'error': 'No image data received in request'}), 400
         
-        # Process image from file upload
-        if 'image' in request.files:
-            print("Image received as file upload")
-            image_file = request.files['image']
-            img_bytes = image_file.read()
-            img = Image.open(io.BytesIO(img_bytes))
-            img = np.array(img)
-        else:
-            # Process base64 encoded image
-            print("Image received as base64")
-            image_data = request.form['image']
-            if ',' in image_data:
-                header, image_b64 = image_data.split(',', 1)
-            else:
-                image_b64 = image_data
-            
+        try:
+            region = get_crop_region()
+        except ValueError as region_error:
+            return jsonify({'error': str(region_error)}), 400
+        
+        # Optional multi-face mode for panel interviews (requires face detection)
+        multi_face = FACE_DETECTION_ENABLED and request.values.get('multi_face', 'false').lower() == 'true'
+        
+        # Latest frame wins: a newer frame from the same session replaces this one while it waits
+        session_id = get_session_id()
+        with admission.admit(session_id, deadline):
+            # Decode straight from the request buffer, at reduced resolution when possible
             try:
-                img_bytes = base64.b64decode(image_b64)
-                img = Image.open(io.BytesIO(img_bytes))
-                img = np.array(img)
+                img = decode_image_bytes(img_bytes)
             except Exception as decode_error:
-                print(f"Error decoding image: {str(decode_error)}")
+                logger.error("Error decoding image: %s", decode_error)
                 raise
-        
-        print(f"Image processed successfully. Shape: {img.shape}")
-        
-        # Perform emotion analysis
-        result = analyze_emotion(img)
-        print(f"Analysis results: {result['classified_emotion']} with confidence {result['confidence']}")
+            
+            logger.debug("Image processed successfully. Shape: %s", img.shape)
+            
+            # Perform emotion analysis
+            check_deadline(deadline)
+            result = analyze_emotion(img, session_id, region, deadline, multi_face=multi_face)
+            result['next_capture_ms'] = recommend_capture_delay(session_id, result['detected_emotions'])
+        logger.debug("Analysis results: %s with confidence %.3f", result['classified_emotion'], result['confidence'])
         
         response = jsonify(result)
         response.headers.add('Access-Control-Allow-Origin', '*')
         return response
     
+    except RequestShed as shed:
+        return shed_response(shed)
     except Exception as e:
-        print("Error in image analysis:")
-        traceback.print_exc()
+        logger.exception("Error in image analysis")
         error_response = jsonify({'error': str(e)})
         error_response.headers.add('Access-Control-Allow-Origin', '*')
         return error_response, 500
 
+@sock.route('/api/stream')
+def stream_analysis(ws):
+    """
+    Streaming emotion analysis over a WebSocket
+    The client sends binary JPEG frames and JSON control messages:
+      {"type": "crop_box", "value": "x,y,w,h"} - region covered by the following frames
+      {"type": "next_question"}                - include a question in the next update
+    The server answers every frame with an update smoothed over recent frames.
+    Updates carry a suggested_question only when the smoothed category changes or one was requested
+    Every update carries next_capture_ms, the recommended delay before the client sends its next frame
+    """
+    session_id = get_session_id()
+    smoother = EmotionSmoother(
+        method=STREAM_SMOOTHING_METHOD,
+        alpha=STREAM_SMOOTHING_ALPHA,
+        window=STREAM_SMOOTHING_WINDOW
+    )
+    region = FULL_REGION
+    last_category = None
+    want_question = True
+    logger.info("Stream opened for session %s", session_id)
+    
+    def handle_control(message):
+        nonlocal region, want_question
+        try:
+            control = json.loads(message)
+            if control.get('type') == 'crop_box':
+                region = parse_crop_region(control.get('value'))
+            elif control.get('type') == 'next_question':
+                want_question = True
+        except (ValueError, AttributeError) as control_error:
+            ws.send(json.dumps({'type': 'error', 'error': str(control_error)}))
+    
+    try:
+        while True:
+            message = ws.receive()
+            if message is None:
+                continue
+            
+            # Control messages
+            if isinstance(message, str):
+                handle_control(message)
+                continue
+            
+            # Latest frame wins: skip frames that queued up while the previous one was analyzed
+            while True:
+                pending = ws.receive(timeout=0)
+                if pending is None:
+                    break
+                if isinstance(pending, str):
+                    handle_control(pending)
+                else:
+                    REQUESTS_SHED.inc(endpoint='/api/stream', reason='superseded')
+                    message = pending
+            
+            # Frames
+            if predictor is None and MODEL_BACKGROUND_LOAD:
+                start_model_loader()
+                ws.send(json.dumps({'type': 'error', 'error': 'Emotion model is still loading', 'retryable': True}))
+                continue
+            try:
+                deadline = time.monotonic() + ANALYZE_DEADLINE_MS / 1000.0
+                with admission.admit(session_id, deadline):
+                    frame = analyze_frame(decode_image_bytes(message), session_id, region, deadline)
+            except RequestShed as shed:
+                REQUESTS_SHED.inc(endpoint='/api/stream', reason=shed.reason)
+                ws.send(json.dumps({'type': 'shed', 'status': shed.reason, 'error': str(shed)}))
+                continue
+            except Exception as e:
+                logger.error("Error in streamed frame analysis: %s", e)
+                ws.send(json.dumps({'type': 'error', 'error': str(e)}))
+                continue
+            
+            smoothed = smoother.update(frame['detected_emotions'])
+            classified_emotion, category, confidence = classify_emotions(smoothed)
+            update = {
+                'type': 'emotion',
+                'classified_emotion': classified_emotion,
+                'category': category,
+                'confidence': confidence,
+                'detected_emotions': smoothed,
+                'raw_emotions': frame['detected_emotions'],
+                'face_box': frame['face_box'],
+                'face_source': frame['face_source'],
+                'cached_result': frame['cached_result'],
+                'analysis_id': frame['analysis_id'],
+                'next_capture_ms': recommend_capture_delay(session_id, frame['detected_emotions'])
+            }
+            
+            if want_question or category != last_category:
+                update['suggested_question'] = suggest_question(
+                    classified_emotion, category, confidence, session_id
+                )
+                want_question = False
+            last_category = category
+            
+            ws.send(json.dumps(update))
+    except ConnectionClosed:
+        logger.info("Stream closed for session %s", session_id)
+
+@app.route('/api/explain', methods=['POST'])
+def request_explanation():
+    """
+    Queue a Grad-CAM explanation of the classified emotion
+    Takes the analysis_id of a recent analysis result, or a frame uploaded the same way as to /api/analyze.
+    Answers 202 with the URL of the PNG overlay (200 when it is already cached)
+    """
+    if not EXPLAIN_ENABLED:
+        return jsonify({'error': 'Explanations are disabled'}), 404
+    not_ready = model_not_ready_response()
+    if not_ready is not None:
+        return not_ready
+    
+    try:
+        analysis_id = request.values.get('analysis_id') or (request.get_json(silent=True) or {}).get('analysis_id')
+        if not analysis_id:
+            img_bytes = get_uploaded_image_bytes()
+            if not img_bytes:
+                return jsonify({'error': 'Send an analysis_id or an image'}), 400
+            try:
+                region = get_crop_region()
+            except ValueError as region_error:
+                return jsonify({'error': str(region_error)}), 400
+            
+            # Analyze the frame on a throwaway session so no interview state is touched
+            explain_session = f"explain-{uuid.uuid4().hex}"
+            try:
+                frame = analyze_frame(decode_image_bytes(img_bytes), explain_session, region, record=False)
+            finally:
+                face_trackers.pop(explain_session)
+                duplicate_frames.forget(explain_session)
+            analysis_id = frame['analysis_id']
+        
+        analysis = recent_analyses.get(analysis_id)
+        if analysis is None:
+            return jsonify({'error': 'Unknown or expired analysis_id'}), 404
+        
+        future = explainer.submit(analysis_id, analysis['tensor'], analysis['image'], analysis['class_index'])
+        ready = future.done() and future.exception() is None
+        return jsonify({
+            'status': 'ready' if ready else 'pending',
+            'analysis_id': analysis_id,
+            'url': f"/api/explain/{analysis_id}"
+        }), 200 if ready else 202
+    
+    except Exception as e:
+        logger.exception("Error queuing explanation")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/explain/<analysis_id>', methods=['GET'])
+def get_explanation(analysis_id):
+    """
+    PNG Grad-CAM overlay for a queued explanation
+    Answers 202 while it is still being computed; ?wait=N blocks for up to N seconds (at most 10)
+    """
+    state, value = explainer.result(analysis_id)
+    if state == 'pending':
+        wait = min(max(request.args.get('wait', 0.0, type=float), 0.0), 10.0)
+        try:
+            value = value.result(timeout=wait)
+            state = 'ready'
+        except FuturesTimeoutError:
+            return jsonify({'status': 'pending', 'analysis_id': analysis_id}), 202
+        except Exception as e:
+            state, value = 'failed', str(e)
+    
+    if state == 'ready':
+        return Response(value, mimetype='image/png', headers={'Cache-Control': 'private, max-age=3600'})
+    if state == 'failed':
+        return jsonify({'status': 'failed', 'error': value}), 500
+    return jsonify({'error': 'Unknown or expired explanation'}), 404
+
 @app.route('/api/test', methods=['GET'])
 def test_api():
     """Simple endpoint to check server availability"""
@@ -518,28 +1404,113 @@ def test_api():
         'time': time.strftime('%Y-%m-%d %H:%M:%S')
     })
 
+@app.route('/api/health/live', methods=['GET'])
+def liveness():
+    """Liveness probe - the process is up and serving, whether or not the model is loaded"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness():
+    """Readiness probe - 200 only once the model is loaded and warmed up"""
+    if predictor is None:
+        return jsonify({
+            'status': model_status['state'],
+            'error': model_status['error']
+        }), 503
+    return jsonify({
+        'status': 'ready',
+        'backend': INFERENCE_BACKEND,
+        'load_seconds': model_status['load_seconds'],
+        'admission': admission.stats(),
+        'llm': llama_client.stats()
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Latency histograms and counters in Prometheus text format"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/frame-cache/stats', methods=['GET'])
+def get_frame_cache_stats():
+    """Hit/miss counters of near-duplicate frame detection, for tuning the threshold"""
+    return jsonify({
+        'status': 'success',
+        'enabled': DUPLICATE_FRAME_ENABLED,
+        **duplicate_frames.stats()
+    })
+
 @app.route('/api/used-questions', methods=['GET'])
 def get_used_questions():
     """Get list of questions already asked in current interview"""
+    used_questions = session_store.get_used_questions(get_session_id())
     return jsonify({
         'status': 'success',
         'count': len(used_questions),
         'questions': list(used_questions)
     })
 
+@app.route('/api/timeline/summary', methods=['GET'])
+def get_timeline_summary():
+    """Per-emotion means, time above each threshold and category shares for the session's timeline"""
+    session_id = get_session_id()
+    timeline = timelines.get(session_id)
+    if timeline is None:
+        return jsonify({'error': 'No analyzed frames recorded for this session'}), 404
+    return jsonify({
+        'status': 'success',
+        'session_id': session_id,
+        **summarize(timeline, emotion_thresholds, TIMELINE_MAX_GAP_SECONDS)
+    })
+
+@app.route('/api/timeline/export', methods=['GET'])
+def export_timeline():
+    """
+    Download the session's timeline as CSV (default) or XLSX (?format=xlsx)
+    Rows are streamed in chunks from one snapshot of the timeline
+    """
+    session_id = get_session_id()
+    timeline = timelines.get(session_id)
+    if timeline is None:
+        return jsonify({'error': 'No analyzed frames recorded for this session'}), 404
+    
+    export_format = request.args.get('format', 'csv').lower()
+    filename = f"emotion_timeline_{time.strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    if export_format == 'csv':
+        body = iter_csv(timeline)
+        mimetype = 'text/csv'
+    elif export_format == 'xlsx':
+        body = iter_xlsx(timeline, emotion_thresholds, TIMELINE_MAX_GAP_SECONDS)
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        return jsonify({'error': f"Unsupported export format: {export_format}"}), 400
+    
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
 if __name__ == '__main__':
     try:
-        # Attempt to load model before starting server
-        print("Attempting to load emotion recognition model...")
-        try:
-            load_emotion_model()
-            print("Model loaded successfully, starting server...")
-        except Exception as model_error:
-            print(f"Warning: Could not load model: {str(model_error)}")
-            print("Continuing server startup anyway...")
+        if MODEL_BACKGROUND_LOAD:
+            # Serve right away and route analysis traffic once /api/health/ready passes
+            logger.info("Loading emotion recognition model in the background...")
+            start_model_loader()
+        else:
+            # Attempt to load model before starting server
+            logger.info("Attempting to load emotion recognition model...")
+            try:
+                load_emotion_model()
+                logger.info("Model loaded successfully, starting server...")
+            except Exception as model_error:
+                logger.warning("Could not load model: %s", model_error)
+                logger.warning("Continuing server startup anyway...")
+        
+        # Start generating questions in the background
+        if QUESTION_POOL_PREFILL:
+            prefill_question_pool()
         
         # Start Flask server
         app.run(debug=True, host='0.0.0.0', port=5001)
     except Exception as e:
-        print(f"Critical error: {str(e)}")
-        traceback.print_exc()
\ No newline at end of file
+        logger.exception("Critical error: %s", e)
\ No newline at end of file
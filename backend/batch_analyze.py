@@ -0,0 +1,184 @@
+# batch_analyze.py - Offline emotion analysis of recorded interview videos
+# Streams frames from video files, runs the model on large batches and writes an emotion timeline per video
+#
+# Usage:
+#   python batch_analyze.py interview1.mp4 interview2.mp4 --sample-fps 2 --format csv --output-dir timelines
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Set in each worker process by init_worker
+emotion_app = None
+
+
+def iter_video_frames(path, sample_fps):
+    """
+    Bounded-memory generator of (frame_index, timestamp_seconds, frame) sampled at sample_fps
+    Skipped frames are only grabbed, never decoded
+    """
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise IOError(f"Cannot open video file: {path}")
+
+    try:
+        video_fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        step = max(1, int(round(video_fps / sample_fps))) if sample_fps > 0 else 1
+        frame_index = 0
+        while True:
+            if not capture.grab():
+                break
+            if frame_index % step == 0:
+                ok, frame = capture.retrieve()
+                if ok:
+                    yield frame_index, frame_index / video_fps, frame
+            frame_index += 1
+    finally:
+        capture.release()
+
+
+def iter_batches(frames, batch_size, tracker=None):
+    """
+    Group sampled frames into preprocessed model batches
+    Yields (frame_indices, timestamps, batch) with batch shaped (N, H, W, C)
+    """
+    indices, timestamps, tensors = [], [], []
+    for frame_index, timestamp, frame in frames:
+        if tracker is not None:
+            pixel_box, _, _, _ = tracker.locate(frame)
+            if pixel_box is not None:
+                frame = emotion_app.crop_face(frame, pixel_box)
+        indices.append(frame_index)
+        timestamps.append(timestamp)
+        tensors.append(emotion_app.preprocess_image(frame))
+
+        if len(tensors) >= batch_size:
+            yield indices, timestamps, np.concatenate(tensors, axis=0)
+            indices, timestamps, tensors = [], [], []
+
+    if tensors:
+        yield indices, timestamps, np.concatenate(tensors, axis=0)
+
+
+def analyze_video(path, output_dir, output_format="csv", sample_fps=2.0, batch_size=64, face_detection=True):
+    """
+    Build the emotion timeline for one video and write it to output_dir
+    Returns (output_path, frame_count, elapsed_seconds)
+    """
+    import pandas as pd
+    from face_tracking import FaceTracker
+
+    started = time.time()
+    emotion_labels = list(emotion_app.emotion_thresholds.keys())
+    tracker = FaceTracker(
+        emotion_app.face_detector,
+        redetect_interval=emotion_app.FACE_REDETECT_INTERVAL,
+        min_confidence=emotion_app.FACE_TRACK_MIN_CONFIDENCE
+    ) if face_detection else None
+
+    columns = {'frame': [], 'timestamp': [], 'classified_emotion': [], 'category': [], 'confidence': []}
+    probabilities = []
+
+    frames = iter_video_frames(path, sample_fps)
+    for indices, timestamps, batch in iter_batches(frames, batch_size, tracker):
+        probs = emotion_app.predictor(batch)
+        probabilities.append(probs.astype(np.float32))
+        for frame_index, timestamp, frame_probs in zip(indices, timestamps, probs):
+            detected = {emotion_labels[i]: float(p) for i, p in enumerate(frame_probs)}
+            classified_emotion, category, confidence = emotion_app.classify_emotions(detected)
+            columns['frame'].append(frame_index)
+            columns['timestamp'].append(round(timestamp, 3))
+            columns['classified_emotion'].append(classified_emotion)
+            columns['category'].append(category)
+            columns['confidence'].append(confidence)
+
+    timeline = pd.DataFrame(columns)
+    probs = np.concatenate(probabilities, axis=0) if probabilities else np.zeros((0, len(emotion_labels)), np.float32)
+    for i, emotion in enumerate(emotion_labels):
+        timeline.insert(2 + i, emotion, probs[:, i])
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    output_path = os.path.join(output_dir, f"{stem}_emotions.{output_format}")
+    if output_format == "parquet":
+        timeline.to_parquet(output_path, index=False)
+    else:
+        timeline.to_csv(output_path, index=False)
+    return output_path, len(timeline), time.time() - started
+
+
+def init_worker(threads_per_worker, verbose=False):
+    """Limit TensorFlow threads for this worker, then import the app and load the model"""
+    global emotion_app
+    # Per-frame analysis details are logged at DEBUG level
+    logging.basicConfig(
+        level=logging.DEBUG if verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    import tensorflow as tf
+    if threads_per_worker:
+        tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    import app
+    app.ensure_model_loaded()
+    emotion_app = app
+
+
+def run_job(path, options):
+    return analyze_video(path, **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline emotion analysis of recorded interview videos")
+    parser.add_argument("videos", nargs="+", help="Video files to analyze")
+    parser.add_argument("--output-dir", default=".", help="Directory for the timeline files")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="Timeline file format (parquet needs pyarrow)")
+    parser.add_argument("--sample-fps", type=float, default=2.0, help="Frames per second to analyze (0 = every frame)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Frames per model batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parallel worker processes (one video each)")
+    parser.add_argument("--no-face-detection", action="store_true", help="Analyze full frames instead of the face ROI")
+    parser.add_argument("--verbose", action="store_true", help="Log per-frame analysis details")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    workers = max(1, min(args.workers, len(args.videos)))
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    options = {
+        'output_dir': args.output_dir,
+        'output_format': args.format,
+        'sample_fps': args.sample_fps,
+        'batch_size': args.batch_size,
+        'face_detection': not args.no_face_detection
+    }
+
+    print(f"Analyzing {len(args.videos)} video(s) with {workers} worker(s), {threads_per_worker} thread(s) each")
+    failed = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(threads_per_worker, args.verbose)
+    ) as executor:
+        jobs = {executor.submit(run_job, path, options): path for path in args.videos}
+        for job in as_completed(jobs):
+            path = jobs[job]
+            try:
+                output_path, frame_count, elapsed = job.result()
+                print(f"{path}: {frame_count} frames in {elapsed:.1f}s -> {output_path}")
+            except Exception as e:
+                failed += 1
+                print(f"{path}: failed - {str(e)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+# Benchmark suite for the emotion analysis pipeline
@@ -0,0 +1,290 @@
+# run_benchmarks.py - Reproducible benchmarks for the analyze pipeline
+# Drives preprocess_image, analyze_emotion and the /api/analyze route with synthetic frames,
+# a stand-in model and a local stub LLaMA server, and saves machine-readable results
+#
+# Usage (from the backend directory):
+#   python -m benchmarks.run_benchmarks --output bench_results.json
+#   python -m benchmarks.run_benchmarks --output new.json --compare bench_results.json
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.stub_llama_server import StubLlamaServer
+from benchmarks.stub_model import save_stub_model
+
+RESOLUTIONS = {
+    '480p': (480, 640),
+    '720p': (720, 1280),
+    '1080p': (1080, 1920)
+}
+
+
+def synthetic_frame(height, width, rng):
+    """Smooth random BGR frame - compresses like camera footage rather than pure noise"""
+    import cv2
+    coarse = rng.integers(0, 256, size=(max(2, height // 32), max(2, width // 32), 3), dtype=np.uint8)
+    frame = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC)
+    noise = rng.integers(0, 12, size=frame.shape, dtype=np.uint8)
+    return cv2.add(frame, noise)
+
+
+def encode_jpeg(frame, quality=80):
+    import cv2
+    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return buf.tobytes()
+
+
+def summarize(benchmark, latencies, elapsed, errors, first_error=None, **params):
+    """Throughput and latency percentiles for one benchmark run, with the first error if any"""
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000.0
+    completed = len(latencies_ms)
+    result = {
+        'benchmark': benchmark,
+        **params,
+        'requests': completed + errors,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 4),
+        'throughput_rps': round(completed / elapsed, 2) if elapsed > 0 else 0.0
+    }
+    if first_error is not None:
+        result['first_error'] = first_error
+    if completed:
+        p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+        result.update({
+            'mean_ms': round(float(latencies_ms.mean()), 3),
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3)
+        })
+    return result
+
+
+def run_concurrent(fn, payloads, concurrency, total_requests):
+    """
+    Call fn(worker_id, payload) total_requests times from `concurrency` threads
+    Returns (latencies, elapsed_seconds, error_count, first_error) where first_error
+    is "ExceptionType: message" of the first failed call, or None
+    """
+    counter = itertools.count()
+    latencies = []
+    errors = [0]
+    first_error = []
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        local = []
+        while True:
+            i = next(counter)
+            if i >= total_requests:
+                break
+            started = time.perf_counter()
+            try:
+                fn(worker_id, payloads[i % len(payloads)])
+                local.append(time.perf_counter() - started)
+            except Exception as e:
+                with lock:
+                    errors[0] += 1
+                    if not first_error:
+                        first_error.append(f"{type(e).__name__}: {e}")
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    return latencies, time.perf_counter() - started, errors[0], (first_error or [None])[0]
+
+
+def bench_decode(app, jpegs, resolution, requests):
+    latencies, elapsed, errors, first_error = run_concurrent(
+        lambda _, buf: app.decode_image_bytes(buf), jpegs, 1, requests
+    )
+    return summarize('decode', latencies, elapsed, errors, first_error, resolution=resolution, concurrency=1)
+
+
+def bench_preprocess(app, frames, resolution, requests):
+    latencies, elapsed, errors, first_error = run_concurrent(
+        lambda _, frame: app.preprocess_image(frame), frames, 1, requests
+    )
+    return summarize('preprocess_image', latencies, elapsed, errors, first_error, resolution=resolution, concurrency=1)
+
+
+def bench_analyze(app, frames, resolution, concurrency, requests):
+    latencies, elapsed, errors, first_error = run_concurrent(
+        lambda worker_id, frame: app.analyze_emotion(frame, f"bench-analyze-{worker_id}"),
+        frames, concurrency, requests
+    )
+    return summarize('analyze_emotion', latencies, elapsed, errors, first_error, resolution=resolution, concurrency=concurrency)
+
+
+def bench_route(app, jpegs, resolution, concurrency, requests):
+    clients = {}
+
+    def post(worker_id, buf):
+        client = clients.setdefault(worker_id, app.app.test_client())
+        response = client.post(
+            '/api/analyze',
+            data=buf,
+            content_type='image/jpeg',
+            headers={'X-Session-ID': f"bench-route-{worker_id}"}
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+    latencies, elapsed, errors, first_error = run_concurrent(post, jpegs, concurrency, requests)
+    return summarize('/api/analyze', latencies, elapsed, errors, first_error, resolution=resolution, concurrency=concurrency)
+
+
+def git_revision():
+    """Returns (short revision, None) or (None, reason it could not be determined)"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.PIPE, text=True
+        ).strip(), None
+    except (OSError, subprocess.CalledProcessError) as e:
+        return None, f"{type(e).__name__}: {getattr(e, 'stderr', None) or e}".strip()
+
+
+def result_key(result):
+    return (result['benchmark'], result.get('resolution'), result.get('concurrency'))
+
+
+def print_results(results, baseline=None):
+    """Print a results table, with throughput and p99 deltas against a baseline run if given"""
+    previous = {result_key(r): r for r in (baseline or [])}
+    header = f"{'benchmark':<18}{'res':>7}{'conc':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'err':>6}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        line = (
+            f"{r['benchmark']:<18}{r.get('resolution', ''):>7}{r.get('concurrency', ''):>6}"
+            f"{r['throughput_rps']:>10.1f}{r.get('p50_ms', float('nan')):>10.2f}"
+            f"{r.get('p95_ms', float('nan')):>10.2f}{r.get('p99_ms', float('nan')):>10.2f}{r['errors']:>6}"
+        )
+        old = previous.get(result_key(r))
+        if old and old.get('throughput_rps') and old.get('p99_ms') and r.get('p99_ms'):
+            rps_delta = (r['throughput_rps'] / old['throughput_rps'] - 1) * 100
+            p99_delta = (r['p99_ms'] / old['p99_ms'] - 1) * 100
+            line += f"   rps {rps_delta:+.1f}%  p99 {p99_delta:+.1f}%"
+        print(line)
+        if r.get('first_error'):
+            print(f"    first error: {r['first_error']}")
+
+
+def setup_app(args, workdir):
+    """Build the stand-in model, start the stub LLaMA server and import the app against them"""
+    model_path = os.path.join(workdir, "stub_model.h5")
+    save_stub_model(model_path, channels=args.channels)
+
+    stub = StubLlamaServer(
+        latency_ms=args.llama_latency_ms,
+        jitter_ms=args.llama_jitter_ms,
+        failure_rate=args.llama_failure_rate,
+        seed=args.seed
+    ).start()
+
+    os.environ.update({
+        'MODEL_PATH': model_path,
+        'LLAMA_API_URL': stub.url,
+        'LLAMA_API_KEY': 'benchmark',
+        'QUESTION_CACHE_PATH': os.path.join(workdir, "question_cache.db"),
+        'MODEL_CACHE_DIR': os.path.join(workdir, "model_cache"),
+        'SESSION_STORE_BACKEND': 'memory',
+        'LOG_LEVEL': 'WARNING',
+        'FACE_DETECTION_ENABLED': 'false' if args.no_face_detection else 'true',
+        'DUPLICATE_FRAME_ENABLED': 'true' if args.dedup else 'false'
+    })
+
+    import app
+    app.ensure_model_loaded()
+    app.prefill_question_pool()
+    return app, stub
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the emotion analysis pipeline")
+    parser.add_argument("--output", default="bench_results.json", help="Where to save machine-readable results")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    parser.add_argument("--resolutions", default="480p,720p,1080p", help=f"Comma-separated subset of {','.join(RESOLUTIONS)}")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per benchmark run")
+    parser.add_argument("--frames", type=int, default=16, help="Distinct synthetic frames per resolution")
+    parser.add_argument("--channels", type=int, choices=[1, 3], default=3, help="Stand-in model input channels")
+    parser.add_argument("--llama-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llama-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--llama-failure-rate", type=float, default=0.1)
+    parser.add_argument("--no-face-detection", action="store_true", help="Disable the face localization stage")
+    parser.add_argument("--dedup", action="store_true", help="Keep near-duplicate frame detection enabled")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    resolutions = [r.strip() for r in args.resolutions.split(",") if r.strip()]
+    concurrency_levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    rng = np.random.default_rng(args.seed)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        app, stub = setup_app(args, workdir)
+        results = []
+        try:
+            for resolution in resolutions:
+                height, width = RESOLUTIONS[resolution]
+                raw_frames = [synthetic_frame(height, width, rng) for _ in range(args.frames)]
+                jpegs = [encode_jpeg(frame) for frame in raw_frames]
+                decoded = [app.decode_image_bytes(buf) for buf in jpegs]
+
+                results.append(bench_decode(app, jpegs, resolution, args.requests))
+                results.append(bench_preprocess(app, decoded, resolution, args.requests))
+                for concurrency in concurrency_levels:
+                    results.append(bench_analyze(app, decoded, resolution, concurrency, args.requests))
+                    results.append(bench_route(app, jpegs, resolution, concurrency, args.requests))
+        finally:
+            stub.stop()
+
+    revision, revision_error = git_revision()
+    report = {
+        'metadata': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_revision': revision,
+            'git_revision_error': revision_error,
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'stub_llama_requests': stub.requests,
+            'stub_llama_failures': stub.failures,
+            'arguments': vars(args)
+        },
+        'results': results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f).get('results', [])
+    print_results(results, baseline)
+    print(f"\nResults saved to {args.output}")
+
+    # A run where nothing succeeded means the pipeline is broken, not slow
+    broken = [r for r in results if r['requests'] and r['errors'] == r['requests']]
+    for r in broken:
+        print(f"All {r['requests']} requests of {r['benchmark']} ({r.get('resolution')}, "
+              f"concurrency {r.get('concurrency')}) failed: {r.get('first_error')}", file=sys.stderr)
+    return 1 if broken else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
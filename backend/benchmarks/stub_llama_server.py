@@ -0,0 +1,78 @@
+# stub_llama_server.py - Local stand-in for the LLaMA API
+# Answers generation requests with configurable latency and failure rate
+
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubLlamaServer:
+    """
+    Threaded HTTP server mimicking the text-generation API used by app.py
+    Each request sleeps for latency_ms (+/- jitter_ms) and fails with HTTP 503 at failure_rate
+    """
+
+    def __init__(self, latency_ms=200.0, jitter_ms=50.0, failure_rate=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/generate"
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                delay, fail, number = stub._next_response()
+                time.sleep(delay)
+
+                if fail:
+                    body = json.dumps({"error": "Model is overloaded"}).encode("utf-8")
+                    self.send_response(503)
+                else:
+                    question = f"שאלת מבחן מספר {number}: ספר/י על אתגר מקצועי שהתמודדת איתו?"
+                    body = json.dumps([{"generated_text": question}]).encode("utf-8")
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-llama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _next_response(self):
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            fail = self._random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+            return delay, fail, next(self._counter)
@@ -0,0 +1,35 @@
+# stub_model.py - Small stand-in for the emotion recognition model
+# Same 48x48 input and 7-class softmax output as model_resnet50.h5, but cheap to build and load
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.layers import Conv2D
+
+
+class StandardizedConv2DWithOverride(Conv2D):
+    """Mirror of the custom layer in app.py so the stand-in exercises the custom_objects path"""
+
+    def __init__(self, **kwargs):
+        super(StandardizedConv2DWithOverride, self).__init__(**kwargs)
+
+
+def build_stub_model(channels=3, num_classes=7, seed=0):
+    """Build a small CNN with random weights and the production input/output shapes"""
+    tf.random.set_seed(seed)
+    np.random.seed(seed)
+    inputs = tf.keras.Input(shape=(48, 48, channels))
+    x = StandardizedConv2DWithOverride(filters=32, kernel_size=3, padding="same", activation="relu")(inputs)
+    x = tf.keras.layers.MaxPooling2D()(x)
+    x = tf.keras.layers.Conv2D(64, 3, padding="same", activation="relu")(x)
+    x = tf.keras.layers.MaxPooling2D()(x)
+    x = tf.keras.layers.Conv2D(128, 3, padding="same", activation="relu")(x)
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    outputs = tf.keras.layers.Dense(num_classes, activation="softmax")(x)
+    return tf.keras.Model(inputs, outputs, name="stub_emotion_model")
+
+
+def save_stub_model(path, channels=3):
+    """Build the stand-in model and save it in h5 format at path"""
+    model = build_stub_model(channels=channels)
+    model.save(path)
+    return path
@@ -0,0 +1,82 @@
+# capture_policy.py - Server-recommended delay until the client's next capture
+# Samples sparsely while the candidate's emotional state is stable and densely around transitions
+
+import logging
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FixedCapturePolicy:
+    """Always recommends the same delay - the behaviour of a fixed capture interval"""
+
+    name = "fixed"
+
+    def __init__(self, default_ms=4000):
+        self.default_ms = int(default_ms)
+
+    def update(self, detected_emotions):
+        """Add a frame's probabilities and return the delay in ms until the next capture"""
+        return self.default_ms
+
+    def reset(self):
+        pass
+
+
+class VarianceCapturePolicy:
+    """
+    Capture delay from the variance of recent probabilities
+    The per-emotion variance over the last `window` frames is summed and mapped
+    linearly from max_ms (at or below low_variance) to min_ms (at or above high_variance).
+    The delay shortens at once but grows by at most `growth` per frame, so sampling
+    stays dense for a while after a transition
+    """
+
+    name = "variance"
+
+    def __init__(self, default_ms=4000, min_ms=1000, max_ms=10000, window=5,
+                 low_variance=0.002, high_variance=0.02, growth=1.5):
+        self.default_ms = int(default_ms)
+        self.min_ms = int(min_ms)
+        self.max_ms = max(self.min_ms, int(max_ms))
+        self.low_variance = low_variance
+        self.high_variance = max(high_variance, low_variance + 1e-9)
+        self.growth = max(1.0, growth)
+        self.history = deque(maxlen=max(2, int(window)))
+        self.delay_ms = float(self.default_ms)
+
+    def update(self, detected_emotions):
+        """Add a frame's probabilities and return the delay in ms until the next capture"""
+        self.history.append([detected_emotions[emotion] for emotion in sorted(detected_emotions)])
+        if len(self.history) < 2:
+            return self.default_ms
+
+        variance = float(np.var(np.asarray(self.history, dtype=np.float32), axis=0).sum())
+        instability = min(max((variance - self.low_variance) / (self.high_variance - self.low_variance), 0.0), 1.0)
+        target = self.max_ms - instability * (self.max_ms - self.min_ms)
+        self.delay_ms = target if target <= self.delay_ms else min(target, self.delay_ms * self.growth)
+        logger.debug("Probability variance %.5f -> next capture in %.0f ms", variance, self.delay_ms)
+        return int(round(self.delay_ms))
+
+    def reset(self):
+        self.history.clear()
+        self.delay_ms = float(self.default_ms)
+
+
+def create_capture_policy(name="variance", default_ms=4000, min_ms=1000, max_ms=10000, window=5,
+                          low_variance=0.002, high_variance=0.02):
+    """Build the per-session capture policy selected by configuration"""
+    if name == "fixed":
+        return FixedCapturePolicy(default_ms)
+    if name != "variance":
+        logger.warning("Unknown capture policy '%s', using the variance policy", name)
+    return VarianceCapturePolicy(
+        default_ms=default_ms,
+        min_ms=min_ms,
+        max_ms=max_ms,
+        window=window,
+        low_variance=low_variance,
+        high_variance=high_variance
+    )
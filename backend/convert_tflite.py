@@ -0,0 +1,202 @@
+# convert_tflite.py - Export the emotion recognition model to quantized TFLite
+# Writes float16 and int8 post-training quantized models and checks them against the Keras model
+#
+# Usage:
+#   python convert_tflite.py --model model_resnet50.h5 --faces faces_48x48/ --output-dir .
+#   INFERENCE_BACKEND=tflite TFLITE_MODEL_PATH=model_resnet50_int8.tflite python app.py
+
+import argparse
+import glob
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def load_face_images(directory, limit, seed=0):
+    """Randomly sampled face images (any size, BGR or grayscale) from a directory tree"""
+    import cv2
+
+    paths = [
+        path for path in glob.glob(os.path.join(directory, "**", "*"), recursive=True)
+        if path.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+    if not paths:
+        raise ValueError(f"No face images found in: {directory}")
+
+    rng = np.random.default_rng(seed)
+    rng.shuffle(paths)
+    images = []
+    for path in paths[:limit]:
+        image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            continue
+        if image.ndim == 3 and image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        images.append(image)
+    return images
+
+
+def build_samples(emotion_app, images):
+    """Preprocess images exactly like the server does. Returns an (N, 48, 48, C) float32 array"""
+    return np.concatenate([emotion_app.preprocess_image(image) for image in images], axis=0)
+
+
+def synthetic_samples(input_shape, count, seed=0):
+    """Random inputs - only for smoke-testing the conversion, int8 calibration on them is poor"""
+    rng = np.random.default_rng(seed)
+    return rng.random((count,) + tuple(input_shape[1:]), dtype=np.float32)
+
+
+def convert(keras_model, quantization, calibration=None):
+    """
+    Convert the Keras model to a TFLite flatbuffer
+    quantization: "float16" (weights only) or "int8" (weights and activations, float32 I/O)
+    """
+    import tensorflow as tf
+
+    if quantization not in ("float16", "int8"):
+        raise ValueError(f"Unknown quantization: {quantization}")
+
+    # Convert from an exported SavedModel so the weights are frozen into the flatbuffer
+    # (a Keras 3 model wrapped in a tf.function converts to resource reads without them)
+    export_dir = tempfile.mkdtemp(prefix="emotion_tflite_")
+    try:
+        keras_model.export(export_dir, verbose=False)
+        converter = tf.lite.TFLiteConverter.from_saved_model(export_dir)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        if quantization == "float16":
+            converter.target_spec.supported_types = [tf.float16]
+        else:
+            def representative_dataset():
+                for sample in calibration:
+                    yield [sample[np.newaxis].astype(np.float32)]
+
+            converter.representative_dataset = representative_dataset
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+        return converter.convert()
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+
+def parity_report(emotion_app, tflite_predictor, samples, batch_size=32):
+    """
+    Compare TFLite and Keras outputs on the same preprocessed samples
+    Agreement is measured on the top-1 emotion and on the thresholded category the server reports.
+    Non-finite TFLite outputs are reported as finite=False, since thresholding would map them to neutral
+    """
+    keras_probs = np.concatenate([
+        emotion_app.predictor(samples[i:i + batch_size]) for i in range(0, len(samples), batch_size)
+    ])
+    tflite_probs = np.concatenate([
+        tflite_predictor(samples[i:i + batch_size]) for i in range(0, len(samples), batch_size)
+    ])
+
+    labels = list(emotion_app.emotion_thresholds.keys())
+
+    def category(probs):
+        return emotion_app.classify_emotions({labels[i]: float(p) for i, p in enumerate(probs)})[1]
+
+    finite = bool(np.isfinite(tflite_probs).all())
+    differences = np.abs(keras_probs - tflite_probs) if finite else np.full(keras_probs.shape, np.inf)
+    return {
+        'samples': len(samples),
+        'finite': finite,
+        'top1_agreement': float(np.mean(keras_probs.argmax(axis=1) == tflite_probs.argmax(axis=1))),
+        'category_agreement': float(np.mean([
+            category(k) == category(t) for k, t in zip(keras_probs, tflite_probs)
+        ])),
+        'mean_abs_diff': float(differences.mean()),
+        'max_abs_diff': float(differences.max())
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the emotion model to quantized TFLite and check parity")
+    parser.add_argument("--model", default="model_resnet50.h5", help="Keras model to convert")
+    parser.add_argument("--faces", help="Directory of face images used for int8 calibration and the parity check")
+    parser.add_argument("--output-dir", default=".", help="Directory for the .tflite files")
+    parser.add_argument("--quantization", default="float16,int8", help="Comma-separated subset of float16,int8")
+    parser.add_argument("--calibration-samples", type=int, default=300, help="Representative samples for int8 calibration")
+    parser.add_argument("--parity-samples", type=int, default=500, help="Held-out samples for the parity check")
+    parser.add_argument("--min-agreement", type=float, default=0.97, help="Fail if top-1 agreement is below this")
+    parser.add_argument("--max-abs-diff", type=float, default=0.25, help="Fail if any probability differs by more than this")
+    parser.add_argument("--threads", type=int, default=2, help="TFLite interpreter threads for the parity check")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    os.environ['MODEL_PATH'] = args.model
+    os.environ['INFERENCE_BACKEND'] = 'keras'
+    os.environ['MODEL_CACHE_DIR'] = ''  # Conversion needs the Keras model itself, not the SavedModel cache
+
+    import app
+    from inference import TFLitePredictor
+
+    keras_model = app.load_emotion_model()
+
+    if args.faces:
+        images = load_face_images(args.faces, args.calibration_samples + args.parity_samples, seed=args.seed)
+        samples = build_samples(app, images)
+        calibration = samples[:args.calibration_samples]
+        parity = samples[args.calibration_samples:]
+        if len(parity) == 0:
+            logging.warning("Not enough images for a held-out parity set, reusing calibration images")
+            parity = calibration
+    else:
+        logging.warning("No --faces directory given, using random inputs. Do not deploy an int8 model calibrated this way")
+        calibration = synthetic_samples(app.model_input_shape, args.calibration_samples, seed=args.seed)
+        parity = synthetic_samples(app.model_input_shape, args.parity_samples, seed=args.seed + 1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(args.model))[0]
+    failed = 0
+    for quantization in [q.strip() for q in args.quantization.split(",") if q.strip()]:
+        flatbuffer = convert(keras_model, quantization, calibration)
+        output_path = os.path.join(args.output_dir, f"{base_name}_{quantization}.tflite")
+
+        # Check parity on a staging file so a failing model never lands where the server loads it
+        staging_path = output_path + ".staging"
+        with open(staging_path, "wb") as f:
+            f.write(flatbuffer)
+        try:
+            report = parity_report(
+                app,
+                TFLitePredictor(staging_path, num_threads=args.threads, max_batch_size=32),
+                parity
+            )
+        except Exception:
+            os.remove(staging_path)
+            raise
+
+        passed = (
+            report['finite']
+            and report['top1_agreement'] >= args.min_agreement
+            and report['max_abs_diff'] <= args.max_abs_diff
+        )
+        if passed:
+            os.replace(staging_path, output_path)
+        else:
+            os.remove(staging_path)
+        failed += not passed
+        print(
+            f"{output_path}: {len(flatbuffer) / 1e6:.1f} MB, "
+            f"top-1 agreement {report['top1_agreement']:.2%}, "
+            f"category agreement {report['category_agreement']:.2%}, "
+            f"mean |dp| {report['mean_abs_diff']:.4f}, max |dp| {report['max_abs_diff']:.4f} "
+            f"on {report['samples']} samples - "
+            f"{'OK' if passed else 'NON-FINITE OUTPUT, NOT WRITTEN' if not report['finite'] else 'BELOW THRESHOLD, NOT WRITTEN'}"
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
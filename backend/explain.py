@@ -0,0 +1,228 @@
+# explain.py - Grad-CAM explanations of emotion predictions
+# Computes heatmaps on a low-priority background pool, batching pending jobs, and caches the PNG overlays
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+from lazy_modules import lazy_import
+
+cv2 = lazy_import("cv2")
+tf = lazy_import("tensorflow")
+
+logger = logging.getLogger(__name__)
+
+
+class PNGCache:
+    """Thread-safe LRU of encoded overlays, bounded by their total size in bytes"""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max(1, int(max_bytes))
+        self._items = OrderedDict()  # key -> PNG bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._items.pop(key, None)
+            if png is not None:
+                self._items[key] = png
+            return png
+
+    def set(self, key, png):
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._items[key] = png
+            self._bytes += len(png)
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._items), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+
+def find_feature_layer(model):
+    """Last top-level layer producing a 4D feature map (a nested backbone counts as one layer)"""
+    for layer in reversed(model.layers):
+        try:
+            shape = layer.output.shape
+        except (AttributeError, ValueError):
+            continue
+        if len(shape) == 4:
+            return layer
+    raise ValueError("Model has no convolutional feature map to explain")
+
+
+def render_overlay(image, cam, alpha=0.4):
+    """Blend a [0, 1] heatmap over a BGR or grayscale image and encode it as PNG"""
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    height, width = image.shape[:2]
+    heatmap = cv2.resize(cam.astype(np.float32), (width, height), interpolation=cv2.INTER_LINEAR)
+    heatmap = cv2.applyColorMap(np.uint8(255 * np.clip(heatmap, 0.0, 1.0)), cv2.COLORMAP_JET)
+    overlay = cv2.addWeighted(image, 1.0 - alpha, heatmap, alpha, 0)
+    ok, buf = cv2.imencode(".png", overlay, [cv2.IMWRITE_PNG_COMPRESSION, 9])
+    if not ok:
+        raise RuntimeError("PNG encoding failed")
+    return buf.tobytes()
+
+
+class GradCamExplainer:
+    """
+    Asynchronous Grad-CAM service
+    Jobs (model input, display image, class index) are queued and picked up by
+    `workers` low-priority threads, which run up to max_batch_size pending jobs
+    through one gradient pass. Results are kept in a size-bounded PNG cache
+    """
+
+    def __init__(self, model_fn, max_batch_size=8, max_wait_ms=50.0, workers=1,
+                 cache_max_bytes=16 * 1024 * 1024, alpha=0.4, niceness=10):
+        self.model_fn = model_fn  # Returns the Keras model, called lazily on the first job
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.workers = max(1, int(workers))
+        self.alpha = alpha
+        self.niceness = niceness
+        self.cache = PNGCache(cache_max_bytes)
+        self._pending = {}  # key -> Future of jobs not finished yet
+        self._failed = OrderedDict()  # key -> error message of recently failed jobs
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        self._grad_model = None
+        self._model_lock = threading.Lock()
+
+    def submit(self, key, tensor, image, class_index):
+        """
+        Queue a Grad-CAM job unless its result is cached or already pending
+        Returns a Future resolving to the PNG overlay
+        """
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            self._failed.pop(key, None)
+            future = Future()
+            png = self.cache.get(key)
+            if png is not None:
+                future.set_result(png)
+                return future
+            self._pending[key] = future
+        self._ensure_workers()
+        self._queue.put((key, tensor, image, class_index, future))
+        return future
+
+    def result(self, key):
+        """Return ('ready', png), ('pending', future), ('failed', message) or (None, None) for an unknown key"""
+        png = self.cache.get(key)
+        if png is not None:
+            return 'ready', png
+        with self._lock:
+            future = self._pending.get(key)
+            error = self._failed.get(key)
+        if future is not None:
+            return 'pending', future
+        if error is not None:
+            return 'failed', error
+        return None, None
+
+    def _ensure_workers(self):
+        """Start the worker threads on first use (and again in forked children)"""
+        with self._lock:
+            if self._pid == os.getpid() and all(thread.is_alive() for thread in self._threads):
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"gradcam-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _run(self):
+        # Lower this thread's scheduling priority so explanations yield to real-time analysis
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.niceness)
+        except (AttributeError, OSError) as e:
+            logger.debug("Could not lower Grad-CAM worker priority: %s", e)
+
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _gradient_model(self):
+        with self._model_lock:
+            if self._grad_model is None:
+                model = self.model_fn()
+                layer = find_feature_layer(model)
+                logger.info("Grad-CAM uses feature layer: %s", layer.name)
+                self._grad_model = tf.keras.Model(model.inputs, [layer.output, model.output])
+            return self._grad_model
+
+    def _process(self, batch):
+        try:
+            cams = self.compute_cams(
+                np.stack([tensor for _, tensor, _, _, _ in batch]).astype(np.float32),
+                np.array([class_index for _, _, _, class_index, _ in batch], dtype=np.int32)
+            )
+        except Exception as e:
+            logger.exception("Grad-CAM batch failed")
+            for key, _, _, _, future in batch:
+                self._finish(key, future, error=e)
+            return
+
+        for (key, _, image, _, future), cam in zip(batch, cams):
+            try:
+                png = render_overlay(image, cam, self.alpha)
+                self.cache.set(key, png)
+                self._finish(key, future, png=png)
+            except Exception as e:
+                self._finish(key, future, error=e)
+
+    def _finish(self, key, future, png=None, error=None):
+        with self._lock:
+            self._pending.pop(key, None)
+            if error is not None:
+                self._failed[key] = str(error)
+                while len(self._failed) > 256:
+                    self._failed.popitem(last=False)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(png)
+
+    def compute_cams(self, inputs, class_indices):
+        """Grad-CAM maps in [0, 1] for a batch of model inputs, one target class per row"""
+        grad_model = self._gradient_model()
+        inputs = tf.convert_to_tensor(inputs)
+        with tf.GradientTape() as tape:
+            features, predictions = grad_model(inputs, training=False)
+            # Rows are independent in inference mode, so one summed score gives every row its own gradient
+            scores = tf.gather(predictions, class_indices, axis=1, batch_dims=1)
+            total = tf.reduce_sum(scores)
+        gradients = tape.gradient(total, features)
+
+        weights = tf.reduce_mean(gradients, axis=(1, 2), keepdims=True)
+        cams = tf.nn.relu(tf.reduce_sum(weights * features, axis=-1)).numpy()
+        maxima = cams.reshape(len(cams), -1).max(axis=1).reshape(-1, 1, 1)
+        return cams / np.maximum(maxima, 1e-8)
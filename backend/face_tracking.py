@@ -0,0 +1,177 @@
+# face_tracking.py - Face localization with cross-frame ROI tracking
+# Runs the full face detector only every few frames and tracks the face ROI in between
+
+import threading
+
+import numpy as np
+
+from lazy_modules import lazy_import
+
+cv2 = lazy_import("cv2")
+
+TEMPLATE_SIZE = 32  # Width of the face template used for tracking, in pixels
+FULL_REGION = (0.0, 0.0, 1.0, 1.0)
+
+
+def to_grayscale(image):
+    if len(image.shape) == 3 and image.shape[2] == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if len(image.shape) == 3:
+        return image[:, :, 0]
+    return image
+
+
+def expand_box(box, margin, width, height):
+    """Grow a pixel box (x, y, w, h) by margin on every side and clip it to the image"""
+    x, y, w, h = box
+    dx, dy = w * margin, h * margin
+    x0, y0 = max(0, int(x - dx)), max(0, int(y - dy))
+    x1, y1 = min(width, int(x + w + dx)), min(height, int(y + h + dy))
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def normalize_box(pixel_box, region, width, height):
+    """Map a pixel box of a (width x height) image covering `region` to fractions of the full frame"""
+    rx, ry, rw, rh = region
+    x, y, w, h = pixel_box
+    return (
+        rx + x / width * rw,
+        ry + y / height * rh,
+        w / width * rw,
+        h / height * rh
+    )
+
+
+class FaceDetector:
+    """
+    Haar cascade frontal face detector
+    Each thread gets its own classifier since OpenCV cascades are not thread-safe
+    """
+
+    def __init__(self, cascade_path=None, scale_factor=1.1, min_neighbors=5, min_size=24):
+        self.cascade_path = cascade_path  # Resolved on first use so OpenCV is not imported up front
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self._local = threading.local()
+
+    def _classifier(self):
+        classifier = getattr(self._local, 'classifier', None)
+        if classifier is None:
+            if self.cascade_path is None:
+                self.cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+            classifier = cv2.CascadeClassifier(self.cascade_path)
+            if classifier.empty():
+                raise RuntimeError(f"Could not load face cascade from {self.cascade_path}")
+            self._local.classifier = classifier
+        return classifier
+
+    def detect(self, gray):
+        """Return every face as a pixel box (x, y, w, h), largest first"""
+        faces = self._classifier().detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(self.min_size, self.min_size)
+        )
+        boxes = [tuple(int(v) for v in face) for face in faces]
+        return sorted(boxes, key=lambda b: b[2] * b[3], reverse=True)
+
+
+class FaceTracker:
+    """
+    Tracks one session's face ROI across frames
+    Boxes are kept in normalized full-frame coordinates so frames and
+    client-side crops (described by a region of the full frame) can be mixed
+    """
+
+    def __init__(self, detector, redetect_interval=10, min_confidence=0.6, search_margin=0.5):
+        self.detector = detector
+        self.redetect_interval = max(1, int(redetect_interval))
+        self.min_confidence = min_confidence
+        self.search_margin = search_margin
+        self.box = None        # Normalized (x, y, w, h) in the full frame
+        self.template = None   # Grayscale face patch, TEMPLATE_SIZE wide
+        self.frames_since_detection = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.box = None
+            self.template = None
+            self.frames_since_detection = 0
+
+    def locate(self, image, region=FULL_REGION):
+        """
+        Find the face in an image covering `region` of the full frame
+        Returns (pixel_box, normalized_box, source, confidence); boxes are None when no face is found
+        """
+        gray = to_grayscale(image)
+        with self._lock:
+            if self.box is not None and self.frames_since_detection < self.redetect_interval:
+                tracked = self._track(gray, region)
+                if tracked is not None and tracked[1] >= self.min_confidence:
+                    pixel_box, confidence = tracked
+                    self._update(gray, pixel_box, region)
+                    self.frames_since_detection += 1
+                    return pixel_box, self.box, 'tracked', confidence
+
+            faces = self.detector.detect(gray)
+            if not faces:
+                self.box = None
+                self.template = None
+                return None, None, None, 0.0
+
+            pixel_box = faces[0]
+            self._update(gray, pixel_box, region)
+            self.frames_since_detection = 0
+            return pixel_box, self.box, 'detected', 1.0
+
+    def _to_pixels(self, box, region, width, height):
+        rx, ry, rw, rh = region
+        x, y, w, h = box
+        return (
+            (x - rx) / rw * width,
+            (y - ry) / rh * height,
+            w / rw * width,
+            h / rh * height
+        )
+
+    def _update(self, gray, pixel_box, region):
+        height, width = gray.shape[:2]
+        x, y, w, h = pixel_box
+        patch = gray[y:y + h, x:x + w]
+        scale = TEMPLATE_SIZE / float(w)
+        self.template = cv2.resize(patch, (TEMPLATE_SIZE, max(1, int(round(h * scale)))))
+        self.box = normalize_box(pixel_box, region, width, height)
+
+    def _track(self, gray, region):
+        """Re-find the face template in a window around the previous ROI"""
+        height, width = gray.shape[:2]
+        x, y, w, h = self._to_pixels(self.box, region, width, height)
+        if w < 8 or h < 8 or x + w <= 0 or y + h <= 0 or x >= width or y >= height:
+            return None
+
+        sx, sy, sw, sh = expand_box((x, y, w, h), self.search_margin, width, height)
+        scale = TEMPLATE_SIZE / w
+        window = gray[sy:sy + sh, sx:sx + sw]
+        window = cv2.resize(window, (max(1, int(round(sw * scale))), max(1, int(round(sh * scale)))))
+        th, tw = self.template.shape[:2]
+        if window.shape[0] < th or window.shape[1] < tw:
+            return None
+
+        scores = cv2.matchTemplate(window, self.template, cv2.TM_CCOEFF_NORMED)
+        _, confidence, _, (mx, my) = cv2.minMaxLoc(scores)
+        if not np.isfinite(confidence):
+            return None
+        pixel_box = (
+            int(round(sx + mx / scale)),
+            int(round(sy + my / scale)),
+            int(round(w)),
+            int(round(h))
+        )
+        # Keep the box inside the image
+        px, py, pw, ph = pixel_box
+        pw, ph = min(pw, width), min(ph, height)
+        px, py = min(max(0, px), width - pw), min(max(0, py), height - ph)
+        return (px, py, pw, ph), float(confidence)
@@ -0,0 +1,81 @@
+# frame_decoder.py - Decoding of uploaded frames straight from the request buffer
+# Uses OpenCV's reduced-resolution JPEG decoding so full-size frames are never materialized
+
+import struct
+
+import numpy as np
+
+from lazy_modules import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# Reduced decode mode names by downscale factor (looked up on the cv2 module when decoding)
+REDUCED_GRAYSCALE_MODES = {
+    2: "IMREAD_REDUCED_GRAYSCALE_2",
+    4: "IMREAD_REDUCED_GRAYSCALE_4",
+    8: "IMREAD_REDUCED_GRAYSCALE_8"
+}
+REDUCED_COLOR_MODES = {
+    2: "IMREAD_REDUCED_COLOR_2",
+    4: "IMREAD_REDUCED_COLOR_4",
+    8: "IMREAD_REDUCED_COLOR_8"
+}
+
+# JPEG start-of-frame markers that carry the image dimensions
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_dimensions(buf):
+    """
+    Read (height, width) from a JPEG header without decoding it
+    Returns None if the buffer is not a JPEG or the header is malformed
+    """
+    data = memoryview(buf)
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    offset = 2
+    while offset + 9 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker in SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[offset + 5:offset + 9])
+            return height, width
+        segment_length = struct.unpack(">H", data[offset + 2:offset + 4])[0]
+        offset += 2 + segment_length
+    return None
+
+
+def choose_reduction(dimensions, min_side):
+    """Largest downscale factor (1, 2, 4 or 8) that keeps the short side at least min_side pixels"""
+    if dimensions is None:
+        return 1
+    short_side = min(dimensions)
+    for factor in (8, 4, 2):
+        if short_side // factor >= min_side:
+            return factor
+    return 1
+
+
+def decode_frame(buf, grayscale=False, min_side=96):
+    """
+    Decode an encoded image (JPEG, PNG, ...) from a bytes-like buffer
+    JPEGs are decoded at reduced resolution when they are larger than needed.
+    Returns a BGR array, or a 2D array when grayscale is requested
+    """
+    array = np.frombuffer(buf, dtype=np.uint8)
+    factor = choose_reduction(jpeg_dimensions(buf), min_side)
+
+    if factor > 1:
+        mode = getattr(cv2, REDUCED_GRAYSCALE_MODES[factor] if grayscale else REDUCED_COLOR_MODES[factor])
+    else:
+        mode = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+
+    img = cv2.imdecode(array, mode)
+    if img is None:
+        raise ValueError("Could not decode image data")
+    return img
@@ -0,0 +1,80 @@
+# frame_dedup.py - Near-duplicate frame detection
+# Skips inference when a session's new frame is visually almost the same as the last analyzed one
+
+import threading
+import time
+
+import numpy as np
+
+from lazy_modules import lazy_import
+from session_store import LRUCache
+
+cv2 = lazy_import("cv2")
+
+
+def difference_hash(tensor, hash_size=8):
+    """
+    Perceptual difference hash of a preprocessed frame tensor (1 x H x W x C)
+    Returns a hash_size * hash_size bit integer
+    """
+    img = np.asarray(tensor, dtype=np.float32)
+    img = img.reshape(img.shape[-3:])
+    gray = img.mean(axis=-1)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).tobytes().hex(), 16)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class DuplicateFrameFilter:
+    """
+    Remembers the fingerprint and probabilities of each session's last analyzed frame
+    A new frame within max_distance bits of it reuses the cached probabilities
+    """
+
+    def __init__(self, max_distance=4, max_age_seconds=30, max_sessions=1000, ttl_seconds=None):
+        self.max_distance = max_distance
+        self.max_age = max_age_seconds
+        self._last = LRUCache(max_size=max_sessions, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, session_id, fingerprint):
+        """Return cached probabilities if the frame is a near-duplicate, otherwise None"""
+        entry = self._last.get(session_id)
+        hit = (
+            entry is not None
+            and time.monotonic() - entry['time'] <= self.max_age
+            and hamming_distance(entry['fingerprint'], fingerprint) <= self.max_distance
+        )
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry['probs'] if hit else None
+
+    def store(self, session_id, fingerprint, probs):
+        self._last.set(session_id, {
+            'fingerprint': fingerprint,
+            'probs': np.array(probs, copy=True),
+            'time': time.monotonic()
+        })
+
+    def forget(self, session_id):
+        self._last.pop(session_id)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'max_distance': self.max_distance,
+                'max_age_seconds': self.max_age
+            }
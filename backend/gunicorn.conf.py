@@ -0,0 +1,64 @@
+# gunicorn.conf.py - Production serving with a supervised, threaded worker
+# Each instance runs exactly one worker process. TensorFlow is not fork-safe, so the model
+# cannot be loaded in the master and shared copy-on-write: every worker would hold a private
+# copy of the weights (about 130 MB for the Keras ResNet50, about 160 MB for the fp16 TFLite
+# model). Per-session state - face trackers, capture policies, duplicate frames, admission
+# slots, recent analyses - also lives in the process, and gunicorn spreads connections over
+# its workers without regard to the session. Concurrency therefore comes from request threads
+# sharing the worker's micro-batcher; to scale out, run one instance per port behind a proxy
+# that routes by session id (see README, Production Serving)
+#
+# Usage (from the backend directory):
+#   gunicorn -c gunicorn.conf.py app:app
+#   WEB_BIND=127.0.0.1:5002 WEB_THREADS=8 INFERENCE_THREADS=4 gunicorn -c gunicorn.conf.py app:app
+# Graceful restart of the worker: kill -HUP <master pid>
+
+import multiprocessing
+import os
+
+cpu_count = multiprocessing.cpu_count()
+
+# Worker configuration
+workers = 1  # Sessions and the model are per process, see above
+threads = int(os.getenv("WEB_THREADS", "8"))  # Request threads - they share the worker's micro-batcher
+worker_class = "gthread"  # Threaded workers also serve the /api/stream WebSocket
+bind = os.getenv("WEB_BIND", "0.0.0.0:5001")
+
+# Import the app in the master so configuration errors stop the server before the worker starts
+preload_app = True
+
+# Restart behaviour
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))  # In-flight requests finish on HUP/TERM
+keepalive = 5
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))  # Recycle workers after N requests, 0 disables
+max_requests_jitter = max_requests // 10
+
+# Inference threads default to all cores; lower INFERENCE_THREADS when several instances
+# share the host. Must be in the environment before the app module is imported below,
+# since app.py reads its configuration at import time
+os.environ.setdefault("INFERENCE_THREADS", str(cpu_count))
+for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(variable, os.environ["INFERENCE_THREADS"])
+
+accesslog = os.getenv("WEB_ACCESS_LOG", None)  # e.g. "-" for stdout
+errorlog = "-"
+
+
+def when_ready(server):
+    server.log.info(
+        "Serving with %d thread(s) and %s inference thread(s)",
+        threads, os.environ["INFERENCE_THREADS"]
+    )
+
+
+def post_fork(server, worker):
+    """
+    Worker startup. Runs in the child, where background threads, thread pools and
+    SQLite connections from the app are (re)created lazily on first use
+    """
+    import app
+
+    app.start_model_loader()
+    if app.QUESTION_POOL_PREFILL:
+        app.prefill_question_pool()
@@ -0,0 +1,221 @@
+# inference.py - Inference scheduling for the emotion recognition model
+# Collects preprocessed frames from concurrent requests and runs them through the model together
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from admission import DeadlineExceeded
+from lazy_modules import lazy_import
+
+tf = lazy_import("tensorflow")
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledPredictor:
+    """
+    Graph-compiled inference entry point used instead of model.predict
+    Traces the model once with a fixed input signature and caches the
+    model input shape so callers never have to query the model for it
+    A model restored from the SavedModel cache is passed with its input
+    shape and serving function instead of a Keras model
+    """
+
+    def __init__(self, model, max_batch_size=8, input_shape=None, forward=None):
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.input_shape = tuple(input_shape or model.input_shape)
+        self.input_channels = self.input_shape[-1] if len(self.input_shape) > 1 else None
+
+        signature = [tf.TensorSpec(shape=(None,) + self.input_shape[1:], dtype=tf.float32)]
+        self._forward = tf.function(
+            forward or (lambda x: model(x, training=False)),
+            input_signature=signature
+        )
+
+    def warmup(self):
+        """Run dummy inputs for every supported batch size so no request pays for tracing"""
+        for batch_size in range(1, self.max_batch_size + 1):
+            dummy = np.zeros((batch_size,) + self.input_shape[1:], dtype=np.float32)
+            self(dummy)
+        logger.info("Inference warmed up for batch sizes 1-%d", self.max_batch_size)
+
+    def __call__(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        return self._forward(tf.convert_to_tensor(batch)).numpy()
+
+
+def _tflite_interpreter_class():
+    """Prefer the standalone LiteRT runtime when installed, otherwise the one bundled with TensorFlow"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLitePredictor:
+    """
+    Inference entry point backed by a (quantized) TFLite model
+    Exposes the same interface as CompiledPredictor. A single interpreter is kept
+    since each one holds its own delegate-packed copy of the weights; it is not
+    thread-safe, so calls are serialized and the input tensor is resized only when
+    the batch size changes
+    """
+
+    def __init__(self, model_path, num_threads=None, max_batch_size=8):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.max_batch_size = max(1, int(max_batch_size))
+        self._interpreter = _tflite_interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self._input_details = self._interpreter.get_input_details()[0]
+        self._output_details = self._interpreter.get_output_details()[0]
+        self._batch_size = None
+        self._lock = threading.Lock()
+
+        self.input_shape = (None,) + tuple(int(d) for d in self._input_details['shape'][1:])
+        self.input_channels = self.input_shape[-1] if len(self.input_shape) > 1 else None
+        with self._lock:
+            self._resize(1)
+
+    def _resize(self, batch_size):
+        """Resize the input tensor for batch_size rows - callers hold the lock"""
+        if batch_size == self._batch_size:
+            return
+        self._interpreter.resize_tensor_input(
+            self._input_details['index'],
+            [batch_size] + list(self.input_shape[1:])
+        )
+        self._interpreter.allocate_tensors()
+        self._batch_size = batch_size
+
+    def warmup(self):
+        """Run the interpreter at the largest and the smallest batch size"""
+        for batch_size in sorted({self.max_batch_size, 1}, reverse=True):
+            dummy = np.zeros((batch_size,) + self.input_shape[1:], dtype=np.float32)
+            self(dummy)
+        logger.info("TFLite inference warmed up for batch sizes up to %d (threads: %s)",
+                    self.max_batch_size, self.num_threads)
+
+    def __call__(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        outputs = [
+            self._invoke(batch[start:start + self.max_batch_size])
+            for start in range(0, len(batch), self.max_batch_size)
+        ]
+        return np.concatenate(outputs, axis=0)
+
+    def _invoke(self, batch):
+        with self._lock:
+            self._resize(len(batch))
+            self._interpreter.set_tensor(self._input_details['index'], _quantize(batch, self._input_details))
+            self._interpreter.invoke()
+            return _dequantize(self._interpreter.get_tensor(self._output_details['index']), self._output_details)
+
+
+def _quantize(values, details):
+    """Map float inputs onto an integer input tensor (no-op for float models)"""
+    if details['dtype'] == np.float32:
+        return values
+    scale, zero_point = details['quantization']
+    info = np.iinfo(details['dtype'])
+    quantized = np.round(values / scale + zero_point)
+    return np.clip(quantized, info.min, info.max).astype(details['dtype'])
+
+
+def _dequantize(values, details):
+    """Map an integer output tensor back to float probabilities (no-op for float models)"""
+    if details['dtype'] == np.float32:
+        return values
+    scale, zero_point = details['quantization']
+    return (values.astype(np.float32) - zero_point) * scale
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching scheduler
+    Frames submitted by concurrent requests are queued and run through the
+    model as one batch, bounded by a maximum batch size and a maximum wait time
+    """
+
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=10.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, frames, timeout=None, deadline=None):
+        """
+        Queue preprocessed frames (N x H x W x C) and block until their
+        probabilities are ready. Returns an array of shape (N, num_classes)
+        Frames whose monotonic deadline passes while queued are dropped
+        before inference and raise DeadlineExceeded
+        """
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((frames, future, deadline))
+        return future.result(timeout)
+
+    def _ensure_worker(self):
+        """Start the batching thread on first use (and again in forked children)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            rows = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+
+            # Keep collecting frames until the batch is full or the wait time expires
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            self._process(batch)
+
+    def _process(self, batch):
+        # Don't spend model time on frames nobody is waiting for anymore
+        now = time.monotonic()
+        live = []
+        for frames, future, deadline in batch:
+            if deadline is not None and deadline <= now:
+                future.set_exception(DeadlineExceeded("Request deadline passed while queued for inference"))
+            else:
+                live.append((frames, future))
+        if not live:
+            return
+
+        try:
+            inputs = np.concatenate([frames for frames, _ in live], axis=0)
+            probs = np.asarray(self.predict_fn(inputs))
+        except Exception as e:
+            for _, future in live:
+                future.set_exception(e)
+            return
+
+        # Hand each request back its own slice of the batch output
+        offset = 0
+        for frames, future in live:
+            future.set_result(probs[offset:offset + len(frames)])
+            offset += len(frames)
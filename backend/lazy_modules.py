@@ -0,0 +1,36 @@
+# lazy_modules.py - Deferred imports for heavy dependencies
+# Lets the server import and answer health checks before TensorFlow and OpenCV are loaded
+
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access
+    Safe to touch from several threads - the import itself runs once
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Return a LazyModule for name, e.g. `tf = lazy_import("tensorflow")`"""
+    return LazyModule(name)
@@ -0,0 +1,290 @@
+# llm_client.py - Latency-budgeted client for the LLaMA text-generation API
+# Pooled keep-alive connections, one time budget per call, a circuit breaker probed in the background and optional hedged requests
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+    Failed calls and calls slower than slow_call_seconds count as failures. After
+    failure_threshold of them in a row the circuit opens: calls are rejected right
+    away while a background thread runs probe_fn every probe_interval seconds,
+    and the first successful probe closes the circuit again
+    """
+
+    def __init__(self, probe_fn, failure_threshold=3, slow_call_seconds=5.0, probe_interval=15.0,
+                 on_state_change=None):
+        self.probe_fn = probe_fn  # () -> True when the API answered normally
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.slow_call_seconds = slow_call_seconds
+        self.probe_interval = max(0.1, float(probe_interval))
+        self.on_state_change = on_state_change  # Called with True on open and False on close
+        self._failures = 0
+        self._open = False
+        self._opened_at = None
+        self._probe_thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._open
+
+    def allow(self):
+        """True when calls may go through; makes sure an open circuit is being probed"""
+        with self._lock:
+            if not self._open:
+                return True
+        self._ensure_probe()
+        return False
+
+    def record(self, ok, seconds):
+        """Record the outcome and duration of one call"""
+        failed = not ok or (self.slow_call_seconds and seconds >= self.slow_call_seconds)
+        with self._lock:
+            if not failed:
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._open or self._failures < self.failure_threshold:
+                return
+            self._open = True
+            self._opened_at = time.time()
+        logger.warning("LLaMA circuit opened after %d failed or slow calls", self.failure_threshold)
+        self._notify(True)
+        self._ensure_probe()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': 'open' if self._open else 'closed',
+                'consecutive_failures': self._failures,
+                'opened_at': self._opened_at if self._open else None
+            }
+
+    def _close(self):
+        with self._lock:
+            self._open = False
+            self._failures = 0
+            self._opened_at = None
+        logger.info("LLaMA circuit closed after a successful probe")
+        self._notify(False)
+
+    def _notify(self, is_open):
+        if self.on_state_change is not None:
+            self.on_state_change(is_open)
+
+    def _ensure_probe(self):
+        """Start the probe thread while the circuit is open (and again in forked children)"""
+        with self._lock:
+            if not self._open:
+                return
+            if self._probe_thread is not None and self._probe_thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._probe_thread = threading.Thread(target=self._probe_loop, name="llama-probe", daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self):
+        while self.is_open:
+            time.sleep(self.probe_interval)
+            try:
+                ok = self.probe_fn()
+            except Exception as e:
+                logger.debug("LLaMA probe failed: %s", e)
+                ok = False
+            if ok:
+                self._close()
+                return
+
+
+class LlamaClient:
+    """
+    Question generation client for a Hugging Face style text-generation endpoint
+    Every generate() call gets budget_seconds in total, across retries and hedges;
+    requests still running when the budget ends are abandoned. With hedge_after_seconds
+    set, a second identical request is sent when the first has not answered by then
+    and the first usable answer wins
+    """
+
+    def __init__(self, url, api_key=None, max_tokens=100, temperature=0.7, budget_seconds=8.0,
+                 connect_timeout=2.0, pool_size=2, hedge_after_seconds=None, failure_threshold=3,
+                 slow_call_seconds=5.0, probe_interval=15.0, on_attempt=None, on_state_change=None):
+        self.url = url
+        self.api_key = api_key
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.budget_seconds = max(0.1, float(budget_seconds))
+        self.connect_timeout = connect_timeout
+        self.pool_size = max(1, int(pool_size))
+        self.hedge_after_seconds = hedge_after_seconds or None
+        self.on_attempt = on_attempt  # Called with (outcome, seconds) for every HTTP attempt
+        self.breaker = CircuitBreaker(
+            self._probe,
+            failure_threshold=failure_threshold,
+            slow_call_seconds=slow_call_seconds,
+            probe_interval=probe_interval,
+            on_state_change=on_state_change
+        )
+        self._rejected = 0
+        self._hedged = 0
+        self._session = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, exclude=(), max_attempts=3):
+        """
+        Generate one question that is not empty and not in exclude
+        Returns None when the circuit is open, the budget runs out or all attempts fail
+        """
+        if not self.url:
+            return None
+        if not self.breaker.allow():
+            with self._lock:
+                self._rejected += 1
+            logger.debug("LLaMA circuit open, skipping the API call")
+            return None
+
+        deadline = time.monotonic() + self.budget_seconds
+        payload = self._payload(prompt, self.max_tokens)
+        for attempt in range(max_attempts):
+            if time.monotonic() >= deadline:
+                break
+            outcome, text = self._request(payload, deadline, exclude)
+            if outcome == 'ok':
+                return text
+            if outcome == 'duplicate':
+                logger.debug("Attempt %d: Question already stocked or empty. Retrying.", attempt + 1)
+            if not self.breaker.allow():
+                break
+
+        logger.debug("No LLaMA question within the %.1fs budget", self.budget_seconds)
+        return None
+
+    def stats(self):
+        with self._lock:
+            counts = {'rejected_calls': self._rejected, 'hedged_requests': self._hedged}
+        return dict(self.breaker.stats(), **counts)
+
+    def _payload(self, prompt, max_tokens):
+        return {
+            "inputs": prompt,
+            "parameters": {
+                "max_new_tokens": max_tokens,
+                "temperature": self.temperature,
+                "return_full_text": False
+            }
+        }
+
+    def _resources(self):
+        """Keep-alive session and request threads, created on first use (and again in forked children)"""
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size * 2)
+                self._session.mount('http://', adapter)
+                self._session.mount('https://', adapter)
+                self._session.headers["Authorization"] = f"Bearer {self.api_key}"
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.pool_size * 2,
+                    thread_name_prefix="llama-request"
+                )
+            return self._session, self._executor
+
+    def _request(self, payload, deadline, exclude):
+        """One logical attempt - the primary request plus an optional hedge - bounded by the deadline"""
+        _, executor = self._resources()
+        futures = {executor.submit(self._send, payload, deadline, exclude)}
+        hedged = self.hedge_after_seconds is None
+
+        outcome, text = 'timeout', None
+        while futures:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            timeout = remaining if hedged else min(remaining, self.hedge_after_seconds)
+            done, futures = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                if not hedged and self.breaker.allow():
+                    with self._lock:
+                        self._hedged += 1
+                    logger.debug("LLaMA request slower than %.2fs, sending a hedged request", self.hedge_after_seconds)
+                    futures.add(executor.submit(self._send, payload, deadline, exclude))
+                hedged = True
+                continue
+            for future in done:
+                outcome, text = future.result()
+                if outcome == 'ok':
+                    return outcome, text
+            # A failed primary is not worth hedging - the caller retries within the budget
+            hedged = True
+        return outcome, text
+
+    def _send(self, payload, deadline, exclude):
+        """Send one HTTP request, returning (outcome, text); never raises"""
+        session, _ = self._resources()
+        started = time.perf_counter()
+        read_timeout = max(0.1, deadline - time.monotonic())
+        try:
+            response = session.post(self.url, json=payload, timeout=(self.connect_timeout, read_timeout))
+        except requests.Timeout:
+            return self._finish('timeout', started, ok=False)
+        except Exception as e:
+            logger.warning("Error calling LLaMA API: %s", e)
+            return self._finish('exception', started, ok=False)
+
+        if response.status_code != 200:
+            logger.warning("LLaMA API error. Status: %s, Content: %s", response.status_code, response.text)
+            return self._finish('http_error', started, ok=False)
+
+        try:
+            generated_text = self._generated_text(response.json())
+        except (ValueError, AttributeError, TypeError, IndexError) as e:
+            logger.warning("LLaMA API returned an unexpected response: %s", e)
+            return self._finish('http_error', started, ok=False)
+
+        # Check if question is unique and not empty
+        if generated_text and generated_text not in exclude:
+            return self._finish('ok', started, text=generated_text)
+        return self._finish('duplicate', started)
+
+    def _finish(self, outcome, started, ok=True, text=None):
+        seconds = time.perf_counter() - started
+        self.breaker.record(ok, seconds)
+        if self.on_attempt is not None:
+            self.on_attempt(outcome, seconds)
+        return outcome, text
+
+    @staticmethod
+    def _generated_text(result):
+        # Extract generated text from response - raises on malformed bodies such as a list of strings
+        if isinstance(result, list) and len(result) > 0:
+            generated_text = result[0].get('generated_text', '')
+        elif isinstance(result, dict):
+            generated_text = result.get('generated_text', '')
+        else:
+            generated_text = str(result)
+        return generated_text.strip()
+
+    def _probe(self):
+        """Minimal generation request used to check whether the API recovered"""
+        session, _ = self._resources()
+        response = session.post(
+            self.url,
+            json=self._payload("שלום", 1),
+            timeout=(self.connect_timeout, self.budget_seconds)
+        )
+        return response.status_code == 200
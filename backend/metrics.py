@@ -0,0 +1,221 @@
+# metrics.py - Latency histograms and counters in Prometheus text format
+# Lightweight, dependency-free instrumentation for the analysis pipeline
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Default latency buckets in seconds (0.5 ms .. 60 s)
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type_name = "counter"
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the wrapped block, including when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together at the metrics endpoint"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, label_names=()):
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=()):
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry and the pipeline metrics
+registry = MetricsRegistry()
+
+STAGE_LATENCY = registry.histogram(
+    "emotion_stage_latency_seconds",
+    "Latency of each analysis pipeline stage",
+    label_names=("stage",)
+)
+REQUEST_LATENCY = registry.histogram(
+    "emotion_request_latency_seconds",
+    "End-to-end latency of analysis requests",
+    label_names=("endpoint", "status")
+)
+LLAMA_LATENCY = registry.histogram(
+    "emotion_llama_request_latency_seconds",
+    "Latency of individual LLaMA API attempts",
+    label_names=("outcome",)
+)
+LLAMA_ATTEMPTS = registry.counter(
+    "emotion_llama_attempts_total",
+    "LLaMA API attempts by outcome",
+    label_names=("outcome",)
+)
+LLAMA_CIRCUIT_OPEN = registry.gauge(
+    "emotion_llama_circuit_open",
+    "1 while the LLaMA circuit breaker is open and questions come from the fallback banks"
+)
+QUESTIONS = registry.counter(
+    "emotion_questions_total",
+    "Suggested questions by source",
+    label_names=("source",)
+)
+FRAMES = registry.counter(
+    "emotion_frames_total",
+    "Analyzed frames by inference path",
+    label_names=("path",)
+)
+REQUESTS_SHED = registry.counter(
+    "emotion_requests_shed_total",
+    "Analysis requests dropped by admission control instead of being processed",
+    label_names=("endpoint", "reason")
+)
+CAPTURE_DELAY = registry.histogram(
+    "emotion_capture_delay_seconds",
+    "Recommended delay until the client's next capture - the mean sets the per-session request rate",
+    label_names=("policy",),
+    buckets=(0.5, 1.0, 2.0, 3.0, 4.0, 6.0, 8.0, 10.0, 15.0, 30.0)
+)
+INFERENCE_BATCH_SIZE = registry.histogram(
+    "emotion_inference_batch_size",
+    "Number of frames per model batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+
+def timed_stage(stage):
+    """Context manager timing one pipeline stage"""
+    return STAGE_LATENCY.time(stage=stage)
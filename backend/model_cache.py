@@ -0,0 +1,91 @@
+# model_cache.py - SavedModel cache of the emotion recognition model
+# Restoring a SavedModel skips rebuilding the Keras layers from the h5 file, which dominates cold starts
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+from lazy_modules import lazy_import
+
+tf = lazy_import("tensorflow")
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILE = "emotion_model.json"
+
+
+def cache_dir_for(source_path, cache_dir):
+    """
+    Cache directory for one model file
+    Keyed on the file's path, size and mtime and the TensorFlow version, so a new model or TF upgrade misses
+    """
+    stat = os.stat(source_path)
+    fingerprint = "|".join([
+        os.path.abspath(source_path), str(stat.st_size), str(stat.st_mtime_ns), tf.__version__
+    ])
+    digest = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_dir, f"{name}-{digest}")
+
+
+def load_cached_model(source_path, cache_dir):
+    """
+    Restore the cached SavedModel for source_path
+    Returns (restored, input_shape) or None when there is no usable cache entry
+    """
+    try:
+        path = cache_dir_for(source_path, cache_dir)
+    except OSError:
+        return None
+    metadata_path = os.path.join(path, METADATA_FILE)
+    if not os.path.exists(metadata_path):
+        return None
+
+    try:
+        with open(metadata_path, encoding="utf-8") as f:
+            metadata = json.load(f)
+        restored = tf.saved_model.load(path)
+        logger.info("Model restored from SavedModel cache: %s", path)
+        return restored, tuple(metadata['input_shape'])
+    except Exception as e:
+        logger.warning("Ignoring unreadable model cache at %s: %s", path, e)
+        return None
+
+
+def save_cached_model(model, source_path, cache_dir):
+    """
+    Export a loaded Keras model as a SavedModel next to the other cache entries
+    Written to a temporary directory and renamed, so concurrent workers and
+    interrupted exports never leave a partial entry behind
+    """
+    path = cache_dir_for(source_path, cache_dir)
+    if os.path.exists(os.path.join(path, METADATA_FILE)):
+        return path
+
+    staging = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        model.export(staging, verbose=False)  # Only the one-line log below, not the export summary
+        with open(os.path.join(staging, METADATA_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                'source': os.path.abspath(source_path),
+                'input_shape': list(model.input_shape),
+                'tensorflow': tf.__version__
+            }, f)
+        os.replace(staging, path)
+        logger.info("Model cached as SavedModel: %s", path)
+    except OSError as e:
+        shutil.rmtree(staging, ignore_errors=True)
+        if os.path.exists(os.path.join(path, METADATA_FILE)):
+            # Another process finished the same export first
+            logger.debug("Model already cached as SavedModel: %s", path)
+        else:
+            # Disk full, no permission, or a partial write
+            logger.warning("Could not cache model as SavedModel: %s", e)
+    except Exception as e:
+        shutil.rmtree(staging, ignore_errors=True)
+        logger.warning("Could not cache model as SavedModel: %s", e)
+    return path
@@ -0,0 +1,80 @@
+# question_cache.py - Persistent cache of LLaMA generations
+# Content-addressed by the normalized prompt so generated questions are reused across interviews
+
+import hashlib
+import time
+
+from sqlite_db import SQLiteDatabase
+
+
+def prompt_key(prompt, *params):
+    """Content address for a prompt: whitespace-normalized text plus generation parameters"""
+    normalized = " ".join(prompt.split())
+    material = "\x1f".join([normalized] + [str(p) for p in params])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class QuestionCache:
+    """
+    Size-bounded on-disk store of generated questions, several variants per prompt key
+    Least recently used questions are evicted once the stored text exceeds max_bytes
+    """
+
+    def __init__(self, path, max_bytes=5 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max(1, int(max_bytes))
+        self._db = SQLiteDatabase(path, """
+            CREATE TABLE IF NOT EXISTS questions (
+                prompt_key TEXT NOT NULL,
+                question TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (prompt_key, question)
+            );
+            CREATE INDEX IF NOT EXISTS questions_last_used ON questions (last_used);
+        """)
+
+    def get(self, key):
+        """Return every cached question for a prompt key and mark them as recently used"""
+        conn = self._db.connect()
+        questions = [row[0] for row in conn.execute(
+            "SELECT question FROM questions WHERE prompt_key = ?", (key,)
+        )]
+        if questions:
+            conn.execute(
+                "UPDATE questions SET last_used = ? WHERE prompt_key = ?", (time.time(), key)
+            )
+        return questions
+
+    def add(self, key, question):
+        with self._db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO questions (prompt_key, question, size, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, question, len(question.encode("utf-8")), time.time())
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drop least recently used questions until the cache fits in max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM questions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        rows = conn.execute(
+            "SELECT rowid, size FROM questions ORDER BY last_used ASC"
+        ).fetchall()
+        doomed = []
+        for rowid, size in rows:
+            if excess <= 0:
+                break
+            doomed.append((rowid,))
+            excess -= size
+        conn.executemany("DELETE FROM questions WHERE rowid = ?", doomed)
+
+    def stats(self):
+        conn = self._db.connect()
+        count, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM questions"
+        ).fetchone()
+        return {'entries': count, 'bytes': size, 'max_bytes': self.max_bytes}
@@ -0,0 +1,87 @@
+# question_pool.py - Background pre-generation of interview questions
+# Keeps a small stock of generated questions per (emotion, confidence bucket) so requests never wait on the LLM
+
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionPool:
+    """
+    Stock of pre-generated, de-duplicated questions keyed by (emotion, confidence bucket)
+    Taking a question schedules an asynchronous refill on the worker pool
+    """
+
+    def __init__(self, generate_fn, stock_size=3, max_workers=2):
+        self.generate_fn = generate_fn  # (key, exclude) -> question text or None
+        self.stock_size = max(1, int(stock_size))
+        self.max_workers = max(1, int(max_workers))
+        self._stock = {}    # key -> deque of questions
+        self._pending = {}  # key -> number of generations in flight
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def take(self, key, exclude=()):
+        """
+        Take a stocked question for key that is not in exclude
+        Returns None when nothing suitable is in stock. Always triggers a refill
+        """
+        question = None
+        with self._lock:
+            stock = self._stock.setdefault(key, deque())
+            for candidate in list(stock):
+                if candidate not in exclude:
+                    stock.remove(candidate)
+                    question = candidate
+                    break
+        self.refill(key)
+        return question
+
+    def refill(self, key):
+        """Schedule enough generations to bring the stock for key back to its target size"""
+        executor = self._get_executor()
+        with self._lock:
+            stock = self._stock.setdefault(key, deque())
+            pending = self._pending.get(key, 0)
+            missing = self.stock_size - len(stock) - pending
+            if missing <= 0:
+                return
+            self._pending[key] = pending + missing
+        for _ in range(missing):
+            executor.submit(self._generate, key)
+
+    def stock_counts(self):
+        with self._lock:
+            return {key: len(stock) for key, stock in self._stock.items()}
+
+    def _get_executor(self):
+        """Create the worker pool on first use (and again in forked children)"""
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._pending = {}
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="question-pool"
+                )
+            return self._executor
+
+    def _generate(self, key):
+        with self._lock:
+            stocked = set(self._stock.get(key, ()))
+        try:
+            question = self.generate_fn(key, stocked)
+        except Exception as e:
+            logger.warning("Question pre-generation failed for %s: %s", key, e)
+            question = None
+
+        with self._lock:
+            self._pending[key] = max(0, self._pending.get(key, 0) - 1)
+            stock = self._stock.setdefault(key, deque())
+            if question and question not in stock:
+                stock.append(question)
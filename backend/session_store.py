@@ -0,0 +1,229 @@
+# session_store.py - Per-session interview state
+# Keeps the opening-question flag and the set of asked questions for every interview session
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_db import SQLiteDatabase
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Thread-safe dictionary with least-recently-used and time-to-live eviction
+    Used for any per-session state that only needs to live inside one process
+    """
+
+    def __init__(self, max_size=1000, ttl_seconds=None):
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl_seconds
+        self._items = OrderedDict()  # key -> (value, last_access)
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._expire()
+            if key not in self._items:
+                return default
+            value, _ = self._items.pop(key)
+            self._items[key] = (value, time.monotonic())
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (value, time.monotonic())
+            self._expire()
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def get_or_create(self, key, factory):
+        """Return the value for key, creating it with factory() if missing"""
+        with self._lock:
+            value = self.get(key)
+            if value is None:
+                value = factory()
+                self.set(key, value)
+            return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._items.pop(key, None)
+            return default if item is None else item[0]
+
+    def __len__(self):
+        with self._lock:
+            self._expire()
+            return len(self._items)
+
+    def _expire(self):
+        """Drop entries that have not been touched within the TTL"""
+        if not self.ttl:
+            return
+        cutoff = time.monotonic() - self.ttl
+        while self._items:
+            key, (_, last_access) = next(iter(self._items.items()))
+            if last_access >= cutoff:
+                break
+            self._items.popitem(last=False)
+
+
+class InMemorySessionStore:
+    """
+    Session store kept inside the server process
+    Sessions are evicted when idle longer than the TTL or when the store is full
+    """
+
+    def __init__(self, max_sessions=1000, ttl_seconds=4 * 3600):
+        self._sessions = LRUCache(max_size=max_sessions, ttl_seconds=ttl_seconds)
+        self._lock = threading.RLock()
+
+    def _state(self, session_id):
+        return self._sessions.get_or_create(
+            session_id,
+            lambda: {'interview_started': False, 'used_questions': set()}
+        )
+
+    def start_interview(self, session_id):
+        """Mark the interview as started. Returns True only for the call that started it"""
+        with self._lock:
+            state = self._state(session_id)
+            if state['interview_started']:
+                return False
+            state['interview_started'] = True
+            return True
+
+    def get_used_questions(self, session_id):
+        with self._lock:
+            return set(self._state(session_id)['used_questions'])
+
+    def add_used_question(self, session_id, question):
+        """Record a question as asked. Returns False if it was already used in this session"""
+        with self._lock:
+            used = self._state(session_id)['used_questions']
+            if question in used:
+                return False
+            used.add(question)
+            return True
+
+    def clear_used_questions(self, session_id, keep=()):
+        with self._lock:
+            used = self._state(session_id)['used_questions']
+            kept = used.intersection(keep)
+            used.clear()
+            used.update(kept)
+
+    def reset(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id)
+
+
+class SQLiteSessionStore:
+    """
+    Session store backed by a local SQLite database in WAL mode
+    Lets several worker processes on the same host share interview state
+    """
+
+    def __init__(self, path, max_sessions=1000, ttl_seconds=4 * 3600):
+        self.path = path
+        self.max_sessions = max(1, int(max_sessions))
+        self.ttl = ttl_seconds
+        self._last_cleanup = 0.0
+        self._db = SQLiteDatabase(path, """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                interview_started INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS used_questions (
+                session_id TEXT NOT NULL,
+                question TEXT NOT NULL,
+                PRIMARY KEY (session_id, question)
+            );
+            CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+        """)
+
+    def _touch(self, conn, session_id):
+        conn.execute(
+            "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (session_id, time.time())
+        )
+
+    def _evict(self, conn):
+        """Remove expired sessions and trim the least recently used ones beyond the limit"""
+        now = time.time()
+        if now - self._last_cleanup < 60:
+            return
+        self._last_cleanup = now
+
+        stale = []
+        if self.ttl:
+            stale += [row[0] for row in conn.execute(
+                "SELECT session_id FROM sessions WHERE updated_at < ?", (now - self.ttl,)
+            )]
+        stale += [row[0] for row in conn.execute(
+            "SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+            (self.max_sessions,)
+        )]
+        for session_id in set(stale):
+            self._delete(conn, session_id)
+
+    def _delete(self, conn, session_id):
+        conn.execute("DELETE FROM used_questions WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def start_interview(self, session_id):
+        """Mark the interview as started. Returns True only for the call that started it"""
+        with self._db.transaction() as conn:
+            self._evict(conn)
+            self._touch(conn, session_id)
+            cursor = conn.execute(
+                "UPDATE sessions SET interview_started = 1 "
+                "WHERE session_id = ? AND interview_started = 0",
+                (session_id,)
+            )
+            return cursor.rowcount == 1
+
+    def get_used_questions(self, session_id):
+        conn = self._db.connect()
+        rows = conn.execute(
+            "SELECT question FROM used_questions WHERE session_id = ?", (session_id,)
+        )
+        return {row[0] for row in rows}
+
+    def add_used_question(self, session_id, question):
+        """Record a question as asked. Returns False if it was already used in this session"""
+        with self._db.transaction() as conn:
+            self._touch(conn, session_id)
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO used_questions (session_id, question) VALUES (?, ?)",
+                (session_id, question)
+            )
+            return cursor.rowcount == 1
+
+    def clear_used_questions(self, session_id, keep=()):
+        conn = self._db.connect()
+        keep = list(keep)
+        placeholders = ",".join("?" * len(keep))
+        query = "DELETE FROM used_questions WHERE session_id = ?"
+        if keep:
+            query += f" AND question NOT IN ({placeholders})"
+        conn.execute(query, [session_id] + keep)
+
+    def reset(self, session_id):
+        with self._db.transaction() as conn:
+            self._delete(conn, session_id)
+
+
+def create_session_store(backend="memory", path="sessions.db", max_sessions=1000, ttl_seconds=4 * 3600):
+    """Build the session store selected by configuration"""
+    if backend == "sqlite":
+        logger.info("Using SQLite session store at: %s", path)
+        return SQLiteSessionStore(path, max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+    if backend != "memory":
+        logger.warning("Unknown session store backend '%s', using in-memory store", backend)
+    return InMemorySessionStore(max_sessions=max_sessions, ttl_seconds=ttl_seconds)
@@ -0,0 +1,42 @@
+# smoothing.py - Temporal smoothing of emotion probabilities
+# Used by the streaming endpoint so single noisy frames do not flip the detected emotion
+
+from collections import deque
+
+
+class EmotionSmoother:
+    """
+    Smooths a stream of detected_emotions dicts
+    method 'ema' keeps an exponential moving average, 'window' averages the last `window` frames
+    """
+
+    def __init__(self, method="ema", alpha=0.4, window=5):
+        if method not in ("ema", "window"):
+            raise ValueError(f"Unknown smoothing method: {method}")
+        self.method = method
+        self.alpha = alpha
+        self.history = deque(maxlen=max(1, int(window)))
+        self.average = None
+
+    def update(self, detected_emotions):
+        """Add a frame's probabilities and return the smoothed probabilities"""
+        self.history.append(dict(detected_emotions))
+
+        if self.method == "window":
+            count = len(self.history)
+            self.average = {
+                emotion: sum(frame[emotion] for frame in self.history) / count
+                for emotion in detected_emotions
+            }
+        elif self.average is None:
+            self.average = dict(detected_emotions)
+        else:
+            self.average = {
+                emotion: self.alpha * prob + (1 - self.alpha) * self.average.get(emotion, prob)
+                for emotion, prob in detected_emotions.items()
+            }
+        return dict(self.average)
+
+    def reset(self):
+        self.history.clear()
+        self.average = None
@@ -0,0 +1,51 @@
+# sqlite_db.py - Shared SQLite access for the on-disk stores
+# Per-thread connections in WAL mode, reopened after a fork, with the schema created on first use
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SQLiteDatabase:
+    """
+    Connections to one SQLite database file, for use from many threads and worker processes
+    Each thread of each process gets its own connection (sqlite3 connections must not cross
+    threads or a fork). The schema script runs once, when the first connection is opened,
+    so the file is not created until the store is actually used
+    """
+
+    def __init__(self, path, schema=""):
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(self.schema)
+                    self._initialized = True
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction that takes the database lock up front and rolls back on errors"""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
@@ -0,0 +1,398 @@
+# timeline.py - Compact per-session emotion timelines
+# Array-backed ring buffers of analyzed frames (in process or in a SQLite file shared by worker processes)
+# with vectorized summaries and chunked CSV/XLSX export
+
+import csv
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from session_store import LRUCache
+from sqlite_db import SQLiteDatabase
+
+logger = logging.getLogger(__name__)
+
+INITIAL_CAPACITY = 256  # Arrays grow by doubling up to the configured maximum
+
+
+class EmotionTimeline:
+    """
+    Ring buffer of one session's analyzed frames
+    Stores epoch timestamps, a float32 (samples x emotions) probability matrix
+    and int8 codes for the classified emotion and category. Once max_samples is
+    reached the oldest samples are overwritten
+    """
+
+    def __init__(self, labels, categories, max_samples=10000):
+        self.labels = list(labels)
+        self.categories = list(categories)
+        self.max_samples = max(1, int(max_samples))
+        self._emotion_codes = {label: code for code, label in enumerate(self.labels)}
+        self._category_codes = {category: code for code, category in enumerate(self.categories)}
+        self._total = 0  # Samples ever appended
+        self._allocate(min(INITIAL_CAPACITY, self.max_samples))
+        self._lock = threading.Lock()
+
+    def _allocate(self, capacity):
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.probabilities = np.zeros((capacity, len(self.labels)), dtype=np.float32)
+        self.emotion_codes = np.zeros(capacity, dtype=np.int8)
+        self.category_codes = np.zeros(capacity, dtype=np.int8)
+
+    def _grow(self):
+        """Double the arrays while the buffer has not wrapped around yet"""
+        old = (self.timestamps, self.probabilities, self.emotion_codes, self.category_codes)
+        self._allocate(min(len(self.timestamps) * 2, self.max_samples))
+        for new, previous in zip((self.timestamps, self.probabilities, self.emotion_codes, self.category_codes), old):
+            new[:len(previous)] = previous
+
+    def append(self, probabilities, classified_emotion, category, timestamp=None):
+        with self._lock:
+            capacity = len(self.timestamps)
+            if self._total >= capacity and capacity < self.max_samples:
+                self._grow()
+                capacity = len(self.timestamps)
+            index = self._total % capacity
+            self.timestamps[index] = time.time() if timestamp is None else timestamp
+            self.probabilities[index] = probabilities
+            self.emotion_codes[index] = self._emotion_codes.get(classified_emotion, -1)
+            self.category_codes[index] = self._category_codes.get(category, -1)
+            self._total += 1
+
+    def __len__(self):
+        with self._lock:
+            return min(self._total, len(self.timestamps))
+
+    @property
+    def dropped_samples(self):
+        """Samples overwritten after the buffer filled up"""
+        with self._lock:
+            return max(0, self._total - len(self.timestamps))
+
+    def snapshot(self):
+        """
+        Chronologically ordered copies of the stored samples
+        Returns (timestamps, probabilities, emotion_codes, category_codes)
+        """
+        with self._lock:
+            capacity = len(self.timestamps)
+            count = min(self._total, capacity)
+            arrays = (self.timestamps, self.probabilities, self.emotion_codes, self.category_codes)
+            if self._total <= capacity:
+                return tuple(a[:count].copy() for a in arrays)
+            start = self._total % capacity
+            return tuple(np.concatenate((a[start:], a[:start])) for a in arrays)
+
+
+class InMemoryTimelineStore:
+    """
+    Timelines kept inside the server process, one EmotionTimeline per session
+    Only correct while every frame of a session reaches the same process
+    """
+
+    def __init__(self, labels, categories, max_samples=10000, max_sessions=1000, ttl_seconds=None):
+        self.labels = list(labels)
+        self.categories = list(categories)
+        self.max_samples = max_samples
+        self._timelines = LRUCache(max_size=max_sessions, ttl_seconds=ttl_seconds)
+
+    def append(self, session_id, probabilities, classified_emotion, category, timestamp=None):
+        timeline = self._timelines.get_or_create(session_id, lambda: EmotionTimeline(
+            self.labels, self.categories, max_samples=self.max_samples
+        ))
+        timeline.append(probabilities, classified_emotion, category, timestamp)
+
+    def get(self, session_id):
+        """The session's timeline, or None when nothing was recorded for it"""
+        return self._timelines.get(session_id)
+
+    def pop(self, session_id):
+        self._timelines.pop(session_id)
+
+
+class SQLiteTimeline:
+    """
+    One session's timeline in a SQLiteTimelineStore
+    Offers the read interface of EmotionTimeline used by summarize and the exports
+    """
+
+    def __init__(self, store, session_id):
+        self.store = store
+        self.session_id = session_id
+        self.labels = store.labels
+        self.categories = store.categories
+
+    def __len__(self):
+        return min(self.store.total_samples(self.session_id), self.store.max_samples)
+
+    @property
+    def dropped_samples(self):
+        return max(0, self.store.total_samples(self.session_id) - self.store.max_samples)
+
+    def snapshot(self):
+        return self.store.snapshot(self.session_id)
+
+
+class SQLiteTimelineStore:
+    """
+    Timelines in a local SQLite database in WAL mode, shared by all worker processes on the host
+    Each session is a ring of max_samples rows: sample number n is stored in slot n % max_samples
+    """
+
+    def __init__(self, path, labels, categories, max_samples=10000, max_sessions=1000, ttl_seconds=None):
+        self.path = path
+        self.labels = list(labels)
+        self.categories = list(categories)
+        self.max_samples = max(1, int(max_samples))
+        self.max_sessions = max(1, int(max_sessions))
+        self.ttl = ttl_seconds
+        self._emotion_codes = {label: code for code, label in enumerate(self.labels)}
+        self._category_codes = {category: code for code, category in enumerate(self.categories)}
+        self._last_cleanup = 0.0
+        self._db = SQLiteDatabase(path, """
+            CREATE TABLE IF NOT EXISTS timeline_sessions (
+                session_id TEXT PRIMARY KEY,
+                total INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS timeline_samples (
+                session_id TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                timestamp REAL NOT NULL,
+                probabilities BLOB NOT NULL,
+                emotion_code INTEGER NOT NULL,
+                category_code INTEGER NOT NULL,
+                PRIMARY KEY (session_id, slot)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS timeline_sessions_updated_at ON timeline_sessions (updated_at);
+        """)
+
+    def append(self, session_id, probabilities, classified_emotion, category, timestamp=None):
+        now = time.time()
+        blob = np.asarray(probabilities, dtype=np.float32).tobytes()
+        with self._db.transaction() as conn:
+            self._evict(conn, now)
+            conn.execute(
+                "INSERT INTO timeline_sessions (session_id, total, updated_at) VALUES (?, 1, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET total = total + 1, updated_at = excluded.updated_at",
+                (session_id, now)
+            )
+            seq = conn.execute(
+                "SELECT total FROM timeline_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()[0] - 1
+            conn.execute(
+                "INSERT OR REPLACE INTO timeline_samples "
+                "(session_id, slot, seq, timestamp, probabilities, emotion_code, category_code) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (session_id, seq % self.max_samples, seq, now if timestamp is None else timestamp, blob,
+                 self._emotion_codes.get(classified_emotion, -1), self._category_codes.get(category, -1))
+            )
+
+    def get(self, session_id):
+        """The session's timeline, or None when nothing was recorded for it"""
+        return SQLiteTimeline(self, session_id) if self.total_samples(session_id) else None
+
+    def total_samples(self, session_id):
+        row = self._db.connect().execute(
+            "SELECT total FROM timeline_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def snapshot(self, session_id):
+        """Chronologically ordered (timestamps, probabilities, emotion_codes, category_codes)"""
+        rows = self._db.connect().execute(
+            "SELECT timestamp, probabilities, emotion_code, category_code FROM timeline_samples "
+            "WHERE session_id = ? ORDER BY seq", (session_id,)
+        ).fetchall()
+        count = len(rows)
+        probabilities = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32)
+        return (
+            np.fromiter((row[0] for row in rows), dtype=np.float64, count=count),
+            probabilities.reshape(count, len(self.labels)).copy(),
+            np.fromiter((row[2] for row in rows), dtype=np.int8, count=count),
+            np.fromiter((row[3] for row in rows), dtype=np.int8, count=count)
+        )
+
+    def pop(self, session_id):
+        with self._db.transaction() as conn:
+            self._delete(conn, session_id)
+
+    def _delete(self, conn, session_id):
+        conn.execute("DELETE FROM timeline_samples WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM timeline_sessions WHERE session_id = ?", (session_id,))
+
+    def _evict(self, conn, now):
+        """Remove expired sessions and trim the least recently updated ones beyond the limit"""
+        if now - self._last_cleanup < 60:
+            return
+        self._last_cleanup = now
+
+        stale = []
+        if self.ttl:
+            stale += [row[0] for row in conn.execute(
+                "SELECT session_id FROM timeline_sessions WHERE updated_at < ?", (now - self.ttl,)
+            )]
+        stale += [row[0] for row in conn.execute(
+            "SELECT session_id FROM timeline_sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+            (self.max_sessions,)
+        )]
+        for session_id in set(stale):
+            self._delete(conn, session_id)
+
+
+def create_timeline_store(backend, labels, categories, path="timelines.db", max_samples=10000,
+                          max_sessions=1000, ttl_seconds=None):
+    """Build the timeline store selected by configuration"""
+    if backend == "sqlite":
+        logger.info("Using SQLite timeline store at: %s", path)
+        return SQLiteTimelineStore(path, labels, categories, max_samples=max_samples,
+                                   max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+    if backend != "memory":
+        logger.warning("Unknown timeline store backend '%s', using in-memory store", backend)
+    return InMemoryTimelineStore(labels, categories, max_samples=max_samples,
+                                 max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+
+
+def sample_durations(timestamps, max_gap_seconds):
+    """
+    Seconds each sample stands for: the time until the next sample, capped at max_gap_seconds
+    so pauses in capturing are not counted. The last sample gets the median interval
+    """
+    if len(timestamps) == 0:
+        return np.zeros(0, dtype=np.float64)
+    gaps = np.diff(timestamps)
+    last = float(np.median(gaps)) if len(gaps) else 0.0
+    return np.minimum(np.append(gaps, last), max_gap_seconds)
+
+
+def summarize(timeline, thresholds, max_gap_seconds=10.0):
+    """
+    Vectorized summary of a session timeline
+    thresholds is a dict of emotion -> probability; time above threshold is in seconds
+    """
+    timestamps, probabilities, emotion_codes, category_codes = timeline.snapshot()
+    count = len(timestamps)
+    summary = {
+        'samples': count,
+        'dropped_samples': timeline.dropped_samples,
+        'start_time': float(timestamps[0]) if count else None,
+        'end_time': float(timestamps[-1]) if count else None
+    }
+    if not count:
+        return summary
+
+    durations = sample_durations(timestamps, max_gap_seconds)
+    threshold_vector = np.array([thresholds[label] for label in timeline.labels], dtype=np.float32)
+    above = probabilities >= threshold_vector
+
+    means = probabilities.mean(axis=0)
+    maxima = probabilities.max(axis=0)
+    seconds_above = durations @ above
+    emotion_counts = np.bincount(emotion_codes[emotion_codes >= 0], minlength=len(timeline.labels))
+    category_counts = np.bincount(category_codes[category_codes >= 0], minlength=len(timeline.categories))
+
+    summary['duration_seconds'] = round(float(durations.sum()), 3)
+    span = float(timestamps[-1] - timestamps[0])
+    summary['samples_per_minute'] = round((count - 1) / span * 60.0, 3) if span > 0 else None
+    summary['emotions'] = {
+        label: {
+            'mean': round(float(means[i]), 4),
+            'max': round(float(maxima[i]), 4),
+            'threshold': float(threshold_vector[i]),
+            'seconds_above_threshold': round(float(seconds_above[i]), 3),
+            'fraction_above_threshold': round(float(above[:, i].mean()), 4),
+            'classified_count': int(emotion_counts[i])
+        }
+        for i, label in enumerate(timeline.labels)
+    }
+    summary['categories'] = {
+        category: {
+            'count': int(category_counts[i]),
+            'fraction': round(float(category_counts[i]) / count, 4)
+        }
+        for i, category in enumerate(timeline.categories)
+    }
+    return summary
+
+
+def _export_columns(timeline, snapshot):
+    """Header and per-column arrays shared by the CSV and XLSX exports"""
+    timestamps, probabilities, emotion_codes, category_codes = snapshot
+    emotion_names = np.array(timeline.labels + [""], dtype=object)
+    category_names = np.array(timeline.categories + [""], dtype=object)
+    elapsed = timestamps - timestamps[0] if len(timestamps) else timestamps
+    header = ["timestamp", "elapsed_seconds", "classified_emotion", "category"] + timeline.labels
+    columns = [
+        np.round(timestamps, 3),
+        np.round(elapsed, 3),
+        emotion_names[emotion_codes],  # code -1 picks the trailing ""
+        category_names[category_codes]
+    ] + [np.round(probabilities[:, i].astype(np.float64), 5) for i in range(len(timeline.labels))]
+    return header, columns
+
+
+def iter_csv(timeline, chunk_rows=1000):
+    """Yield the timeline as CSV text, one chunk of rows at a time"""
+    header, columns = _export_columns(timeline, timeline.snapshot())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+
+    total = len(columns[0])
+    for start in range(0, total, chunk_rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(zip(*(column[start:start + chunk_rows].tolist() for column in columns)))
+        yield buffer.getvalue()
+
+
+def iter_xlsx(timeline, thresholds, max_gap_seconds=10.0, chunk_rows=1000, chunk_bytes=64 * 1024):
+    """
+    Write the timeline and its summary to an XLSX file in constant-memory mode
+    and yield the file in chunks. The temporary file is removed afterwards.
+    Unlike iter_csv this is not streamed: the whole workbook is written to disk
+    before the first byte is yielded (its size is bounded by the timeline's max_samples)
+    """
+    import xlsxwriter
+
+    header, columns = _export_columns(timeline, timeline.snapshot())
+    summary = summarize(timeline, thresholds, max_gap_seconds)
+
+    handle, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(handle)
+    try:
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        bold = workbook.add_format({'bold': True})
+
+        sheet = workbook.add_worksheet("timeline")
+        sheet.write_row(0, 0, header, bold)
+        total = len(columns[0])
+        for start in range(0, total, chunk_rows):
+            rows = zip(*(column[start:start + chunk_rows].tolist() for column in columns))
+            for offset, row in enumerate(rows):
+                sheet.write_row(start + offset + 1, 0, row)
+
+        sheet = workbook.add_worksheet("summary")
+        sheet.write_row(0, 0, ["emotion", "mean", "max", "threshold", "seconds_above_threshold",
+                               "fraction_above_threshold", "classified_count"], bold)
+        for row, (label, stats) in enumerate(summary.get('emotions', {}).items(), start=1):
+            sheet.write_row(row, 0, [label, stats['mean'], stats['max'], stats['threshold'],
+                                     stats['seconds_above_threshold'], stats['fraction_above_threshold'],
+                                     stats['classified_count']])
+        workbook.close()
+
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_bytes)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
@@ -165,6 +165,7 @@ const QuestionComponent = React.memo(({ questionData, onAsked, onSkipped }) => {
 function App() {
   const [isRecording, setIsRecording] = useState(false);
   const [emotionData, setEmotionData] = useState(null);
+  const [explanation, setExplanation] = useState(null); // { analysisId, url } of the Grad-CAM overlay
   // New status for question data that will be updated separately
   const [questionData, setQuestionData] = useState(null);
   const [loading, setLoading] = useState(false);
@@ -190,6 +191,7 @@ function App() {
   const lastQuestionTimeRef = useRef(Date.now());
   const updateCountRef = useRef(0);
   const lastQuestionDataRef = useRef(null); // Reference to save the last question
+  const pendingQuestionRef = useRef(false); // A question was requested from the stream and not yet shown
 
   // More references
   const videoRef = useRef(null);
@@ -197,16 +199,25 @@ function App() {
   const mediaStreamRef = useRef(null);
   const captureTimerRef = useRef(null);
   const isRecordingRef = useRef(false);
+  const faceBoxRef = useRef(null); // Last face box reported by the server (fractions of the frame)
+  const streamRef = useRef(null); // WebSocket for streaming analysis (HTTP is used when it is not open)
   const questionTimerRef = useRef(null);
+  const nextCaptureDelayRef = useRef(null); // Delay until the next capture recommended by the server (ms)
+  // Interview session id - lets the server keep separate state for each interview
+  const sessionIdRef = useRef(
+    (window.crypto && window.crypto.randomUUID)
+      ? window.crypto.randomUUID()
+      : `${Date.now()}-${Math.random().toString(36).slice(2)}`
+  );
   
   // Time constants
-  const captureInterval = 4; // שניות בין צילומים
+  const captureInterval = 4; // שניות בין צילומים, עד שהשרת ממליץ על מרווח אחר
   const questionInterval = 30 * 1000; // 30 שניות במילישניות בין שאלות באותו רגש
   
   const resetInterview = () => {
     try {
       console.log("מאפס ראיון...");
-      fetch('http://localhost:5001/api/reset-interview', {
+      fetch(`http://localhost:5001/api/reset-interview?session_id=${encodeURIComponent(sessionIdRef.current)}`, {
         method: 'POST'
       })
       .then(response => {
@@ -222,10 +233,12 @@ function App() {
         setQuestionData(null);
         lastQuestionDataRef.current = null;
         setHistory([]);
+        faceBoxRef.current = null;
         
         // reset emotional states
         setLastEmotion(null);
         lastEmotionRef.current = null;
+        pendingQuestionRef.current = false;
         
         // Setting to display a new question on the next shot
         setShouldShowNewQuestion(true);
@@ -268,6 +281,7 @@ function App() {
           // Reset question status when starting a new recording - update state and refs
           setLastEmotion(null);
           lastEmotionRef.current = null;
+          pendingQuestionRef.current = false;
           
           setShouldShowNewQuestion(true);
           shouldShowNewQuestionRef.current = true;
@@ -312,7 +326,7 @@ function App() {
     }
     
     if (captureTimerRef.current) {
-      clearInterval(captureTimerRef.current);
+      clearTimeout(captureTimerRef.current);
       captureTimerRef.current = null;
     }
     
@@ -323,10 +337,13 @@ function App() {
     
     isRecordingRef.current = false;
     setIsRecording(false);
+    faceBoxRef.current = null;
+    closeAnalysisStream();
     
     // Resetting the question state when stopping recording - updating state and refs
     setLastEmotion(null);
     lastEmotionRef.current = null;
+    pendingQuestionRef.current = false;
     
     setShouldShowNewQuestion(true);
     shouldShowNewQuestionRef.current = true;
@@ -346,7 +363,7 @@ function App() {
   const startCaptureTimer = () => {
     // Clear previous timer if present
     if (captureTimerRef.current) {
-      clearInterval(captureTimerRef.current);
+      clearTimeout(captureTimerRef.current);
       captureTimerRef.current = null;
     }
     
@@ -355,27 +372,33 @@ function App() {
       return;
     }
     
-    console.log("מפעיל טיימר לצילום תמונות כל", captureInterval, "שניות");
+    openAnalysisStream();
+    
+    nextCaptureDelayRef.current = captureInterval * 1000;
+    console.log("מפעיל טיימר לצילום תמונות, מרווח התחלתי:", captureInterval, "שניות");
     console.log("שאלות חדשות יוצגו רק אחרי שינוי רגש או", questionInterval / 1000, "שניות");
     
     // Instant First Shot - Always shows a question the first time
-    setTimeout(() => {
-      if (isRecordingRef.current) {
-        captureScreenshot();
-      }
-    }, 500);
-    
-    captureTimerRef.current = setInterval(() => {
+    scheduleNextCapture(500);
+  };
+  
+  // Each capture schedules the next one after the delay recommended by the server
+  const scheduleNextCapture = (delay) => {
+    const timer = setTimeout(async () => {
       if (!isRecordingRef.current || !videoRef.current || !videoRef.current.srcObject) {
         console.log("מבטל טיימר צילום: אין הקלטה פעילה");
-        clearInterval(captureTimerRef.current);
         captureTimerRef.current = null;
         return;
       }
       
       console.log("מבצע צילום תקופתי...");
-      captureScreenshot();
-    }, captureInterval * 1000);
+      await captureScreenshot();
+      // Continue only if the recording was not stopped or restarted meanwhile
+      if (isRecordingRef.current && captureTimerRef.current === timer) {
+        scheduleNextCapture(nextCaptureDelayRef.current);
+      }
+    }, delay);
+    captureTimerRef.current = timer;
   };
 
   // Photography and image analysis
@@ -389,26 +412,275 @@ function App() {
     const canvas = canvasRef.current;
     const ctx = canvas.getContext('2d');
     
-    // Adjusting the canvas size to the video size
-    canvas.width = video.videoWidth;
-    canvas.height = video.videoHeight;
+    // Once the server has located the face, send only the area around it
+    const cropBox = getCropBox(faceBoxRef.current);
+    const sx = Math.round(cropBox.x * video.videoWidth);
+    const sy = Math.round(cropBox.y * video.videoHeight);
+    const sw = Math.max(1, Math.round(cropBox.width * video.videoWidth));
+    const sh = Math.max(1, Math.round(cropBox.height * video.videoHeight));
+    
+    // Adjusting the canvas size to the captured area
+    canvas.width = sw;
+    canvas.height = sh;
     
     // Draw the current image on the canvas.
-    ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
+    ctx.drawImage(video, sx, sy, sw, sh, 0, 0, sw, sh);
     
     try {
-      const imageData = canvas.toDataURL('image/jpeg', 0.8);
-      console.log("תמונה נוצרה בהצלחה, גודל:", imageData.length);
+      // Encode the frame as binary JPEG - avoids the base64 data URL overhead
+      const imageBlob = await new Promise((resolve, reject) => {
+        canvas.toBlob(
+          blob => blob ? resolve(blob) : reject(new Error('יצירת התמונה נכשלה')),
+          'image/jpeg',
+          0.8
+        );
+      });
+      console.log("תמונה נוצרה בהצלחה, גודל:", imageBlob.size);
       
-      // Sending the image to the server for analysis
-      await analyzeImage(imageData);
+      // Sending the image to the server for analysis - over the stream when it is open
+      if (isStreamOpen()) {
+        streamRef.current.send(JSON.stringify({
+          type: 'crop_box',
+          value: [cropBox.x, cropBox.y, cropBox.width, cropBox.height].join(',')
+        }));
+        streamRef.current.send(imageBlob);
+      } else {
+        await analyzeImage(imageBlob, cropBox);
+      }
       
     } catch (err) {
       console.error('שגיאה בצילום תמונה:', err);
       setError('שגיאה בצילום תמונה: ' + err.message);
     }
   };
-  const analyzeImage = async (imageData) => {
+  // Streaming analysis channel - frames go up, smoothed emotion updates come back
+  const openAnalysisStream = () => {
+    if (!('WebSocket' in window) || streamRef.current) {
+      return;
+    }
+    
+    const stream = new WebSocket(
+      `ws://localhost:5001/api/stream?session_id=${encodeURIComponent(sessionIdRef.current)}`
+    );
+    stream.onopen = () => {
+      console.log("ערוץ הזרמה נפתח");
+    };
+    stream.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.type === 'shed') {
+        console.log("הפריים נדחה על ידי השרת:", data.status);
+        return;
+      }
+      if (data.type === 'error') {
+        console.error('שגיאה בניתוח התמונה:', data.error);
+        setError('שגיאה בניתוח התמונה: ' + data.error);
+        return;
+      }
+      setError(null);
+      handleAnalysisResult(data);
+    };
+    stream.onclose = () => {
+      console.log("ערוץ הזרמה נסגר, עובר לשליחה רגילה");
+      if (streamRef.current === stream) {
+        streamRef.current = null;
+      }
+    };
+    streamRef.current = stream;
+  };
+  
+  const closeAnalysisStream = () => {
+    if (streamRef.current) {
+      streamRef.current.close();
+      streamRef.current = null;
+    }
+  };
+  
+  const isStreamOpen = () => (
+    streamRef.current !== null && streamRef.current.readyState === WebSocket.OPEN
+  );
+  
+  // Grad-CAM explanation of the displayed result, computed by the server in the background
+  const explainCurrentEmotion = async () => {
+    const analysisId = emotionData && emotionData.analysis_id;
+    if (!analysisId) {
+      return;
+    }
+    try {
+      const queued = await fetch('http://localhost:5001/api/explain', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'X-Session-ID': sessionIdRef.current,
+        },
+        body: JSON.stringify({ analysis_id: analysisId }),
+      });
+      if (!queued.ok) {
+        throw new Error(`שגיאת שרת: ${queued.status}`);
+      }
+      
+      // Poll until the overlay is ready
+      for (let attempt = 0; attempt < 6; attempt++) {
+        const response = await fetch(`http://localhost:5001/api/explain/${analysisId}?wait=5`, {
+          headers: { 'X-Session-ID': sessionIdRef.current },
+        });
+        if (response.status === 200) {
+          const blob = await response.blob();
+          setExplanation(prev => {
+            if (prev) {
+              URL.revokeObjectURL(prev.url);
+            }
+            return { analysisId, url: URL.createObjectURL(blob) };
+          });
+          return;
+        }
+        if (response.status !== 202) {
+          throw new Error(`שגיאת שרת: ${response.status}`);
+        }
+      }
+    } catch (err) {
+      console.error('שגיאה בקבלת הסבר לרגש:', err);
+    }
+  };
+
+  const requestNextQuestion = () => {
+    if (isStreamOpen()) {
+      streamRef.current.send(JSON.stringify({ type: 'next_question' }));
+      // The server marks the question as used when it sends it - it must be shown when it arrives
+      pendingQuestionRef.current = true;
+    }
+  };
+  
+  // Handling an analysis result - from the HTTP endpoint or the stream
+  const handleAnalysisResult = (data) => {
+    // Remember where the face is so the next capture can be cropped
+    faceBoxRef.current = data.face_box || null;
+    
+    // Capture sparsely while the emotion is stable and densely around changes
+    if (data.next_capture_ms) {
+      nextCaptureDelayRef.current = data.next_capture_ms;
+      console.log("הצילום הבא בעוד", data.next_capture_ms, "מילישניות");
+    }
+    
+    //Update sentiment data in any case - refreshes on every capture
+    setEmotionData({
+      classified_emotion: data.classified_emotion,
+      confidence: data.confidence,
+      category: data.category,
+      detected_emotions: data.detected_emotions,
+      analysis_id: data.analysis_id
+    });
+    
+    // Checking whether to display a new question - use refs instead of state
+    const currentTime = Date.now();
+    const currentEmotion = data.classified_emotion;
+    const timeSinceLastQuestion = currentTime - lastQuestionTimeRef.current;
+    
+    console.log(`=== סטטוס עדכון שאלה ===`);
+    console.log(`רגש נוכחי: ${currentEmotion}, רגש קודם: ${lastEmotionRef.current === null ? 'אין' : lastEmotionRef.current}`);
+    console.log(`זמן מאז השאלה האחרונה: ${Math.floor(timeSinceLastQuestion / 1000)} שניות מתוך ${questionInterval / 1000} נדרשות`);
+    console.log(`דגל שאלה חדשה: ${shouldShowNewQuestionRef.current ? 'פעיל' : 'לא פעיל'}`);
+    console.log(`מספר עדכון: ${updateCountRef.current}`);
+    
+    let shouldUpdate = false;
+    
+    // Streamed updates carry a question only when the server suggests one
+    const hasQuestion = Boolean(data.suggested_question);
+    
+    // The question requested with the previous update arrived
+    if (hasQuestion && pendingQuestionRef.current) {
+      shouldUpdate = true;
+      console.log("✅ מציג שאלה - השאלה שהתבקשה מהשרת הגיעה");
+    }
+    // If there is no previous emotion (first time)
+    else if (lastEmotionRef.current === null) {
+      shouldUpdate = true;
+      console.log("✅ מציג שאלה - רגש ראשון בניתוח");
+    } 
+    // If the emotion is different from before
+    else if (lastEmotionRef.current !== currentEmotion) {
+      shouldUpdate = true;
+      console.log(`✅ מציג שאלה - הרגש השתנה מ-${lastEmotionRef.current} ל-${currentEmotion}`);
+    }
+    // If 30 seconds or more have passed
+    else if (timeSinceLastQuestion >= questionInterval) {
+      shouldUpdate = true;
+      console.log(`✅ מציג שאלה - עברו ${Math.floor(timeSinceLastQuestion / 1000)} שניות באותו רגש`);
+    }
+    // If the user marked a question as asked or skipped
+    else if (shouldShowNewQuestionRef.current) {
+      shouldUpdate = true;
+      console.log("✅ מציג שאלה - השאלה הקודמת סומנה כנשאלה או דולגה");
+    }
+    // Otherwise, no new question is presented.
+    else {
+      console.log(`❌ לא מציג שאלה חדשה - עדיין אותו רגש (${currentEmotion}) ועברו רק ${Math.floor(timeSinceLastQuestion / 1000)} שניות`);
+    }
+    
+    // Ask the stream for a question with the next update (once - the request stays pending until it arrives)
+    if (shouldUpdate && !hasQuestion) {
+      shouldUpdate = false;
+      if (!pendingQuestionRef.current) {
+        requestNextQuestion();
+      }
+    }
+    
+    // The latest emotion update (in state and ref)
+    setLastEmotion(currentEmotion);
+    lastEmotionRef.current = currentEmotion;
+    
+    // Update counter (in state and ref)
+    setUpdateCount(prevCount => {
+      const newCount = prevCount + 1;
+      updateCountRef.current = newCount;
+      return newCount;
+    });
+    
+    // If the question needs to be updated (only in cases of change)
+    if (shouldUpdate) {
+      pendingQuestionRef.current = false;
+      
+      // Creating the new question object
+      const newQuestionData = {
+        question: data.suggested_question,
+        category: data.category,
+        timestamp: new Date().toLocaleTimeString(),
+        id: Date.now() // Unique ID for the question
+      };
+      
+      // Updating the status and reference of the question
+      setQuestionData(newQuestionData);
+      lastQuestionDataRef.current = newQuestionData;
+      
+      // Add to history
+      setHistory(prev => [{ 
+        timestamp: new Date().toLocaleTimeString(), 
+        ...data, 
+        asked: false, 
+        skipped: false 
+      }, ...prev].slice(0, 10));
+      
+      // Update the last question time (in state and ref)
+      setLastQuestionTime(currentTime);
+      lastQuestionTimeRef.current = currentTime;
+      
+      // Reset the flag (in state and ref)
+      setShouldShowNewQuestion(false);
+      shouldShowNewQuestionRef.current = false;
+      
+      // Reset and set a new timer
+      if (questionTimerRef.current) {
+        clearTimeout(questionTimerRef.current);
+      }
+      
+      questionTimerRef.current = setTimeout(() => {
+        console.log(`טיימר הסתיים אחרי ${questionInterval / 1000} שניות, מאפשר שאלה חדשה בצילום הבא`);
+        setShouldShowNewQuestion(true);
+        shouldShowNewQuestionRef.current = true;
+      }, questionInterval);
+    }
+  };
+
+  const analyzeImage = async (imageBlob, cropBox) => {
     try {
       console.log("מתחיל ניתוח תמונה...");
       setLoading(true);
@@ -429,16 +701,28 @@ function App() {
       console.log("שולח נתוני תמונה לשרת...");
       
       const formData = new FormData();
-      formData.append('image', imageData);
+      formData.append('image', imageBlob, 'frame.jpg');
+      formData.append('session_id', sessionIdRef.current);
+      formData.append('crop_box', [cropBox.x, cropBox.y, cropBox.width, cropBox.height].join(','));
       
       const response = await fetch('http://localhost:5001/api/analyze', {
         method: 'POST',
         body: formData,
         headers: {
           'Accept': 'application/json',
+          // Lets a proxy in front of several server instances keep the session on one of them
+          'X-Session-ID': sessionIdRef.current,
+          // Results arriving after the next capture are useless - let the server drop them
+          'X-Request-Deadline-Ms': String(nextCaptureDelayRef.current || captureInterval * 1000),
         },
       });
       
+      // The server dropped this frame (a newer one replaced it, overload, or deadline passed)
+      if ([409, 503, 504].includes(response.status)) {
+        console.log("הפריים נדחה על ידי השרת:", response.status);
+        return;
+      }
+      
       if (!response.ok) {
         const errorText = await response.text();
         throw new Error(`שגיאת שרת: ${response.status} ${response.statusText} - ${errorText}`);
@@ -446,105 +730,7 @@ function App() {
       
       const data = await response.json();
       
-      //Update sentiment data in any case - refreshes every 4 seconds
-      setEmotionData({
-        classified_emotion: data.classified_emotion,
-        confidence: data.confidence,
-        category: data.category,
-        detected_emotions: data.detected_emotions
-      });
-      
-      // Checking whether to display a new question - use refs instead of state
-      const currentTime = Date.now();
-      const currentEmotion = data.classified_emotion;
-      const timeSinceLastQuestion = currentTime - lastQuestionTimeRef.current;
-      
-      console.log(`=== סטטוס עדכון שאלה ===`);
-      console.log(`רגש נוכחי: ${currentEmotion}, רגש קודם: ${lastEmotionRef.current === null ? 'אין' : lastEmotionRef.current}`);
-      console.log(`זמן מאז השאלה האחרונה: ${Math.floor(timeSinceLastQuestion / 1000)} שניות מתוך ${questionInterval / 1000} נדרשות`);
-      console.log(`דגל שאלה חדשה: ${shouldShowNewQuestionRef.current ? 'פעיל' : 'לא פעיל'}`);
-      console.log(`מספר עדכון: ${updateCountRef.current}`);
-      
-      let shouldUpdate = false;
-      
-      // If there is no previous emotion (first time)
-      if (lastEmotionRef.current === null) {
-        shouldUpdate = true;
-        console.log("✅ מציג שאלה - רגש ראשון בניתוח");
-      } 
-      // If the emotion is different from before
-      else if (lastEmotionRef.current !== currentEmotion) {
-        shouldUpdate = true;
-        console.log(`✅ מציג שאלה - הרגש השתנה מ-${lastEmotionRef.current} ל-${currentEmotion}`);
-      }
-      // If 30 seconds or more have passed
-      else if (timeSinceLastQuestion >= questionInterval) {
-        shouldUpdate = true;
-        console.log(`✅ מציג שאלה - עברו ${Math.floor(timeSinceLastQuestion / 1000)} שניות באותו רגש`);
-      }
-      // If the user marked a question as asked or skipped
-      else if (shouldShowNewQuestionRef.current) {
-        shouldUpdate = true;
-        console.log("✅ מציג שאלה - השאלה הקודמת סומנה כנשאלה או דולגה");
-      }
-      // Otherwise, no new question is presented.
-      else {
-        console.log(`❌ לא מציג שאלה חדשה - עדיין אותו רגש (${currentEmotion}) ועברו רק ${Math.floor(timeSinceLastQuestion / 1000)} שניות`);
-      }
-      
-      // The latest emotion update (in state and ref)
-      setLastEmotion(currentEmotion);
-      lastEmotionRef.current = currentEmotion;
-      
-      // Update counter (in state and ref)
-      setUpdateCount(prevCount => {
-        const newCount = prevCount + 1;
-        updateCountRef.current = newCount;
-        return newCount;
-      });
-      
-      // If the question needs to be updated (only in cases of change)
-      if (shouldUpdate) {
-        // Creating the new question object
-        const newQuestionData = {
-          question: data.suggested_question,
-          category: data.category,
-          timestamp: new Date().toLocaleTimeString(),
-          id: Date.now() // Unique ID for the question
-        };
-        
-        // Updating the status and reference of the question
-        setQuestionData(newQuestionData);
-        lastQuestionDataRef.current = newQuestionData;
-        
-        // Add to history
-        setHistory(prev => [{ 
-          timestamp: new Date().toLocaleTimeString(), 
-          ...data, 
-          asked: false, 
-          skipped: false 
-        }, ...prev].slice(0, 10));
-        
-        // Update the last question time (in state and ref)
-        setLastQuestionTime(currentTime);
-        lastQuestionTimeRef.current = currentTime;
-        
-        // Reset the flag (in state and ref)
-        setShouldShowNewQuestion(false);
-        shouldShowNewQuestionRef.current = false;
-        
-        // Reset and set a new timer
-        if (questionTimerRef.current) {
-          clearTimeout(questionTimerRef.current);
-        }
-        
-        questionTimerRef.current = setTimeout(() => {
-          console.log(`טיימר הסתיים אחרי ${questionInterval / 1000} שניות, מאפשר שאלה חדשה בצילום הבא`);
-          setShouldShowNewQuestion(true);
-          shouldShowNewQuestionRef.current = true;
-        }, questionInterval);
-      }
-    
+      handleAnalysisResult(data);
     } catch (err) {
       console.error('שגיאה בניתוח התמונה:', err);
       setError('שגיאה בניתוח התמונה: ' + err.message);
@@ -763,11 +949,14 @@ function App() {
         mediaStreamRef.current.getTracks().forEach(track => track.stop());
       }
       if (captureTimerRef.current) {
-        clearInterval(captureTimerRef.current);
+        clearTimeout(captureTimerRef.current);
       }
       if (questionTimerRef.current) {
         clearTimeout(questionTimerRef.current);
       }
+      if (streamRef.current) {
+        streamRef.current.close();
+      }
     };
   }, []);
 
@@ -901,6 +1090,12 @@ function App() {
                 <p>קטגוריה: <span className={emotionData.category === 'Positive Emotion' ? 'category-positive' : 'category-negative'}>
                   {emotionData.category === 'Positive Emotion' ? 'רגש חיובי' : 'רגש שלילי'}
                 </span></p>
+                <button className="explain-button" onClick={explainCurrentEmotion} disabled={!emotionData.analysis_id}>
+                  הצג הסבר (Grad-CAM)
+                </button>
+                {explanation && (
+                  <img className="explanation-overlay" src={explanation.url} alt="מפת חום של אזורי הפנים שהשפיעו על זיהוי הרגש" />
+                )}
               </div>
               
               {/* This section updates every 4 seconds - Details of emotions */}
@@ -968,6 +1163,18 @@ function App() {
   );
 }
 
+// Area of the frame to capture: the last face box plus a margin, or the full frame
+function getCropBox(faceBox, margin = 0.5) {
+  if (!faceBox) {
+    return { x: 0, y: 0, width: 1, height: 1 };
+  }
+  const x0 = Math.max(0, faceBox.x - faceBox.width * margin);
+  const y0 = Math.max(0, faceBox.y - faceBox.height * margin);
+  const x1 = Math.min(1, faceBox.x + faceBox.width * (1 + margin));
+  const y1 = Math.min(1, faceBox.y + faceBox.height * (1 + margin));
+  return { x: x0, y: y0, width: x1 - x0, height: y1 - y0 };
+}
+
 // A function to convert emotion names into Hebrew
 function getEmotionNameHebrew(emotion) {
   const emotionMap = {